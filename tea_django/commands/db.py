@@ -1,9 +1,39 @@
 import os
+import time
+import asyncio
+import contextlib
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List
 
 import typer
-from tea_django.database.postgresql import PostgreSQL
+from rich.table import Table
+from rich.console import Console
+from tea import serde
+from tea_console.enums import ConsoleFormat
+from rich.progress import (
+    Progress,
+    BarColumn,
+    SpinnerColumn,
+    TextColumn,
+    FileSizeColumn,
+    TimeElapsedColumn,
+    TimeRemainingColumn,
+    TransferSpeedColumn,
+)
+from tea_django.database import get_database
+from tea_django.database.postgresql import PostgreSQL, DumpFormat
+from tea_django.database.codecs import (
+    Compression,
+    get_codec,
+    compare_codecs,
+)
+from tea_django.database import copy as db_copy
+from tea_django.database.parallel import DumpStatus, dump_all
+from tea_django.database.copy import CopyFormat
+from tea_django.database.stats import collect_stats
+from tea_django.database.progress import Metrics
+from tea_django.database.store import DumpStore
+from tea_django.database.maintenance import Operation, maintain as db_maintain
 
 
 def dump(
@@ -24,13 +54,640 @@ def dump(
     delete: bool = typer.Option(
         False, "-d", "--delete", help="Delete backup file if exists."
     ),
+    stream: bool = typer.Option(
+        True,
+        "--stream/--no-stream",
+        help=(
+            "Compress the dump while it's being written instead of writing "
+            "an uncompressed file first."
+        ),
+    ),
+    format: DumpFormat = typer.Option(
+        DumpFormat.plain, "-F", "--format", help="Dump format."
+    ),
+    jobs: int = typer.Option(
+        1,
+        "-j",
+        "--jobs",
+        min=1,
+        help="Number of parallel jobs for directory and incremental dumps.",
+    ),
+    compression: Compression = typer.Option(
+        Compression.gzip,
+        "-c",
+        "--compression",
+        help="Compression codec for plain and incremental dumps.",
+    ),
+    level: Optional[int] = typer.Option(
+        None, "-l", "--level", help="Compression level. Default: codec."
+    ),
+    threads: int = typer.Option(
+        0,
+        "--threads",
+        min=0,
+        help="Compression threads. Default: all cores.",
+    ),
+    verify: bool = typer.Option(
+        False,
+        "--verify",
+        help=(
+            "Checksum every table of an incremental dump instead of "
+            "trusting the table statistics."
+        ),
+    ),
+    all_databases: bool = typer.Option(
+        False,
+        "-a",
+        "--all",
+        help="Dump all configured PostgreSQL databases concurrently.",
+    ),
+    concurrency: int = typer.Option(
+        4,
+        "--concurrency",
+        min=1,
+        help="Maximal number of concurrent dumps with --all.",
+    ),
+    using: str = typer.Option(
+        "default", "-u", "--using", help="Database alias."
+    ),
+):
+    """Dump database.
+
+    Format, jobs and compression options only apply to PostgreSQL, SQLite
+    databases are copied with the online backup API.
+    """
+    kwargs = dict(output_directory=output_directory, tag=tag, delete=delete)
+    database = None if all_databases else get_database(using)
+    if database is not None and not isinstance(database, PostgreSQL):
+        with _progress(database):
+            database.dump(**kwargs)
+        return
+
+    kwargs.update(
+        stream=stream,
+        format=format,
+        jobs=jobs,
+        codec=get_codec(compression, level=level, threads=threads),
+        verify=verify,
+    )
+    if database is not None:
+        with _progress(database):
+            database.dump(**kwargs)
+        return
+
+    _dump_all(concurrency=concurrency, **kwargs)
+
+
+def _size(event) -> str:
+    processed = f"{event.processed / 1024 / 1024:.1f}"
+    if event.total is None:
+        return f"{processed} MB"
+    return f"{processed}/{event.total / 1024 / 1024:.1f} MB"
+
+
+@contextlib.contextmanager
+def _progress(database):
+    """Show progress of every phase and print the phase timings."""
+    console = Console()
+    with Progress(
+        TextColumn("[bold]{task.description}"),
+        BarColumn(),
+        TextColumn("{task.fields[size]}"),
+        TransferSpeedColumn(),
+        TimeRemainingColumn(),
+        TextColumn("{task.fields[table]}"),
+        console=console,
+    ) as progress:
+        tasks = {}
+
+        def on_progress(event):
+            if event.phase not in tasks:
+                tasks[event.phase] = progress.add_task(
+                    event.phase, total=event.total or 0, size="", table=""
+                )
+            if event.finished:
+                # Estimated totals are never exact, show the phase as done.
+                progress.update(
+                    tasks[event.phase],
+                    completed=event.processed,
+                    total=max(event.processed, 1),
+                    size=f"{event.processed / 1024 / 1024:.1f} MB",
+                    table="",
+                )
+                return
+            progress.update(
+                tasks[event.phase],
+                completed=event.processed,
+                total=event.total,
+                size=_size(event),
+                table=event.table or "",
+            )
+
+        database.metrics = Metrics(on_progress=on_progress)
+        yield
+
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Phase")
+    table.add_column("Time (s)", justify="right")
+    for phase, seconds in database.metrics.timings.items():
+        table.add_row(phase, f"{seconds:.1f}")
+    console.print(table)
+
+
+def _dump_all(**kwargs):
+    """Run `dump_all` with a live progress display and print a summary."""
+    console = Console()
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[bold]{task.description}"),
+        TextColumn("{task.fields[status]}"),
+        FileSizeColumn(),
+        TimeElapsedColumn(),
+        console=console,
+    ) as progress:
+        tasks = {}
+
+        def on_progress(result):
+            if result.alias not in tasks:
+                tasks[result.alias] = progress.add_task(
+                    result.alias, status=result.status.value
+                )
+            progress.update(
+                tasks[result.alias],
+                completed=result.size,
+                status=result.status.value,
+            )
+
+        results = asyncio.run(dump_all(on_progress=on_progress, **kwargs))
+
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Alias")
+    table.add_column("Database")
+    table.add_column("Status")
+    table.add_column("Size (MB)", justify="right")
+    table.add_column("Time (s)", justify="right")
+    table.add_column("File")
+    failed = [r for r in results if r.status == DumpStatus.failed]
+    for result in results:
+        color = "red" if result in failed else "green"
+        table.add_row(
+            result.alias,
+            result.database,
+            f"[{color}]{result.status.value}[/{color}]",
+            f"{result.size / 1024 / 1024:.1f}",
+            f"{result.seconds:.1f}",
+            result.filename or "",
+        )
+    console.print(table)
+    for result in failed:
+        console.print(f"[red]{result.alias}: {result.error}[/red]")
+    if failed:
+        raise typer.Exit(code=1)
+
+
+def load(
+    filename: str = typer.Argument(..., help="Dump file to load"),
+    jobs: int = typer.Option(
+        1,
+        "-j",
+        "--jobs",
+        min=1,
+        help="Number of parallel restore and analyze jobs.",
+    ),
+    swap: bool = typer.Option(
+        False,
+        "-s",
+        "--swap",
+        help=(
+            "Restore into a scratch database and swap it with the live one "
+            "when it's ready. The old database is kept for rollback."
+        ),
+    ),
+    analyze: bool = typer.Option(
+        False,
+        "--analyze",
+        help="Analyze tables after the restore. Always done with --swap.",
+    ),
+    using: str = typer.Option(
+        "default", "-u", "--using", help="Database alias."
+    ),
+):
+    """Load database dump.
+
+    SQLite dumps are restored by copying pages into the live database in a
+    single step, jobs and swap options only apply to PostgreSQL.
+    """
+    database = get_database(using)
+    with _progress(database):
+        if isinstance(database, PostgreSQL):
+            database.load(
+                filename=filename, jobs=jobs, swap=swap, analyze=analyze
+            )
+        else:
+            database.load(filename=filename)
+
+
+def rollback(
+    using: str = typer.Option(
+        "default", "-u", "--using", help="Database alias."
+    ),
+):
+    """Swap the live database with the one replaced by `load --swap`."""
+    postgres = PostgreSQL(alias=using)
+    postgres.rollback()
+
+
+def maintain(
+    tables: Optional[List[str]] = typer.Argument(
+        None, help="Tables to process. Default: all tables."
+    ),
+    vacuum: bool = typer.Option(
+        True, "--vacuum/--no-vacuum", help="Run VACUUM."
+    ),
+    analyze: bool = typer.Option(
+        True, "--analyze/--no-analyze", help="Run ANALYZE."
+    ),
+    reindex: bool = typer.Option(
+        False, "--reindex", help="Run REINDEX TABLE CONCURRENTLY."
+    ),
+    jobs: int = typer.Option(
+        4, "-j", "--jobs", min=1, help="Number of tables processed at once."
+    ),
+    using: str = typer.Option(
+        "default", "-u", "--using", help="Database alias."
+    ),
 ):
-    """Dump PostgreSQL database."""
-    postgres = PostgreSQL()
-    postgres.dump(output_directory=output_directory, tag=tag, delete=delete)
+    """Vacuum, analyze and reindex tables in parallel.
+
+    Tables with the most dead tuples and modifications are processed first.
+    """
+    operations = [
+        operation
+        for operation, enabled in (
+            (Operation.vacuum, vacuum),
+            (Operation.analyze, analyze),
+            (Operation.reindex, reindex),
+        )
+        if enabled
+    ]
+    if len(operations) == 0:
+        raise typer.BadParameter("No maintenance operation selected.")
+
+    console = Console()
+    with console.status("Running maintenance...") as status:
+
+        def on_progress(result):
+            status.update(f"Finished {result.table}")
 
+        results = db_maintain(
+            PostgreSQL(alias=using),
+            operations,
+            jobs=jobs,
+            tables=tables or None,
+            on_progress=on_progress,
+        )
+
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Table")
+    table.add_column("Dead", justify="right")
+    table.add_column("Modified", justify="right")
+    table.add_column("Time (s)", justify="right")
+    table.add_column("Status")
+    failed = [r for r in results if r.error is not None]
+    for result in results:
+        table.add_row(
+            result.table,
+            f"{result.dead_tuples}",
+            f"{result.modifications}",
+            f"{result.seconds:.1f}",
+            "[red]failed[/red]" if result in failed else "[green]done[/green]",
+        )
+    console.print(table)
+    for result in failed:
+        console.print(f"[red]{result.table}: {result.error}[/red]")
+    if failed:
+        raise typer.Exit(code=1)
+
+
+def stats(
+    limit: int = typer.Option(
+        10, "-n", "--limit", min=1, help="Number of entries per section."
+    ),
+    format: ConsoleFormat = typer.Option(
+        ConsoleFormat.text, "-f", "--format", help="Output format."
+    ),
+    using: str = typer.Option(
+        "default", "-u", "--using", help="Database alias."
+    ),
+):
+    """Show table bloat, index usage and slowest queries."""
+    result = collect_stats(PostgreSQL(alias=using), limit=limit)
+    if format == ConsoleFormat.json:
+        # Rich would wrap long lines and parse `[...]` in queries as markup.
+        typer.echo(serde.json_dumps(result))
+        return
+
+    console = Console()
+
+    sections = [
+        ("Largest tables", result.tables),
+        ("Largest indexes", result.indexes),
+        ("Unused indexes", result.unused_indexes),
+        ("Duplicate indexes", result.duplicate_indexes),
+        ("Sequential scan heavy tables", result.seq_scan_tables),
+        ("Slowest queries", result.queries),
+    ]
+    for title, objs in sections:
+        console.print(f"[bold]{title}[/bold]")
+        if title == "Slowest queries" and not result.statements_available:
+            console.print("[cyan]pg_stat_statements is not available.[/cyan]")
+        elif len(objs) == 0:
+            console.print("[cyan]Nothing found.[/cyan]")
+        else:
+            table = objs[0].get_rich_table()
+            for obj in objs:
+                table.add_row(*obj.to_rich_row())
+            console.print(table)
+
+
+def store_dump(
+    store: Path = typer.Argument(..., help="Dump store directory."),
+    tag: Optional[str] = typer.Option(
+        None,
+        "-t",
+        "--tag",
+        help="Tag that will be added to the end of the snapshot name.",
+    ),
+    using: str = typer.Option(
+        "default", "-u", "--using", help="Database alias."
+    ),
+):
+    """Dump PostgreSQL database into a deduplicating dump store."""
+    postgres = PostgreSQL(alias=using)
+    with _progress(postgres):
+        name = postgres.dump_to_store(DumpStore(store), tag=tag)
+    Console().print(name)
+
+
+def store_load(
+    name: str = typer.Argument(..., help="Snapshot name."),
+    store: Path = typer.Option(
+        ...,
+        "-s",
+        "--store",
+        help="Dump store directory.",
+        exists=True,
+        file_okay=False,
+    ),
+    jobs: int = typer.Option(
+        1, "-j", "--jobs", min=1, help="Number of parallel analyze jobs."
+    ),
+    swap: bool = typer.Option(
+        False,
+        "--swap",
+        help="Restore into a scratch database and swap it with the live one.",
+    ),
+    analyze: bool = typer.Option(
+        False,
+        "--analyze",
+        help="Analyze tables after the restore. Always done with --swap.",
+    ),
+    using: str = typer.Option(
+        "default", "-u", "--using", help="Database alias."
+    ),
+):
+    """Load a snapshot from a dump store."""
+    postgres = PostgreSQL(alias=using)
+    with _progress(postgres):
+        postgres.load_snapshot(
+            DumpStore(store), name, jobs=jobs, swap=swap, analyze=analyze
+        )
+
+
+def store_list(
+    store: Path = typer.Argument(
+        ..., help="Dump store directory.", exists=True, file_okay=False
+    ),
+    database: Optional[str] = typer.Option(
+        None, "-d", "--database", help="Only list snapshots of a database."
+    ),
+):
+    """List snapshots in a dump store."""
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Name")
+    table.add_column("Database")
+    table.add_column("Created")
+    table.add_column("Size (MB)", justify="right")
+    table.add_column("Chunks", justify="right")
+    for snapshot in DumpStore(store).snapshots(database=database):
+        table.add_row(
+            snapshot.name,
+            snapshot.database,
+            f"{snapshot.created:%Y-%m-%d %H:%M:%S}",
+            f"{snapshot.size / 1024 / 1024:.1f}",
+            f"{len(snapshot.chunks)}",
+        )
+    Console().print(table)
+
+
+def store_prune(
+    store: Path = typer.Argument(
+        ..., help="Dump store directory.", exists=True, file_okay=False
+    ),
+    daily: int = typer.Option(
+        7, "--daily", min=0, help="Number of daily snapshots to keep."
+    ),
+    weekly: int = typer.Option(
+        4, "--weekly", min=0, help="Number of weekly snapshots to keep."
+    ),
+    monthly: int = typer.Option(
+        12, "--monthly", min=0, help="Number of monthly snapshots to keep."
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Only show what would be deleted."
+    ),
+):
+    """Delete snapshots outside the retention rules and unused chunks."""
+    dump_store = DumpStore(store)
+    deleted = dump_store.retain(
+        daily=daily, weekly=weekly, monthly=monthly, dry_run=dry_run
+    )
+    retained = None
+    if dry_run:
+        # The deleted snapshots still exist and reference their chunks.
+        names = {snapshot.name for snapshot in deleted}
+        retained = [
+            snapshot
+            for snapshot in dump_store.snapshots()
+            if snapshot.name not in names
+        ]
+    count, size = dump_store.gc(dry_run=dry_run, retained=retained)
+    console = Console()
+    verb = "Would delete" if dry_run else "Deleted"
+    for snapshot in deleted:
+        console.print(f"{verb} snapshot {snapshot.name}")
+    console.print(f"{verb} {count} chunks, {size / 1024 / 1024:.1f} MB.")
+
+
+def codecs(
+    filename: str = typer.Argument(..., help="Dump file to compress."),
+    limit: Optional[int] = typer.Option(
+        None,
+        "--limit",
+        min=1,
+        help="Only compress the first N megabytes of the dump.",
+    ),
+):
+    """Compare compression ratio and throughput of available codecs."""
+    results = compare_codecs(
+        filename, limit=None if limit is None else limit * 1024 * 1024
+    )
+
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Codec")
+    table.add_column("Level", justify="right")
+    table.add_column("Input (MB)", justify="right")
+    table.add_column("Output (MB)", justify="right")
+    table.add_column("Ratio", justify="right")
+    table.add_column("Throughput (MB/s)", justify="right")
+    for result in results:
+        table.add_row(
+            result.codec,
+            f"{result.level}",
+            f"{result.input_size / 1024 / 1024:.1f}",
+            f"{result.output_size / 1024 / 1024:.1f}",
+            f"{result.ratio:.2f}",
+            f"{result.throughput / 1024 / 1024:.1f}",
+        )
+    Console().print(table)
+
+
+def export_tables(
+    tables: List[str] = typer.Argument(
+        ..., help="Models (app_label.Model) or table names."
+    ),
+    output_directory: Path = typer.Option(
+        os.getcwd(),
+        "-o",
+        "--output-directory",
+        help="File output directory. Default: Current working directory.",
+        dir_okay=True,
+        file_okay=False,
+    ),
+    format: CopyFormat = typer.Option(
+        CopyFormat.binary, "-F", "--format", help="COPY data format."
+    ),
+    using: str = typer.Option(
+        "default", "-u", "--using", help="Database alias."
+    ),
+):
+    """Export tables with COPY."""
+    os.makedirs(output_directory, exist_ok=True)
+    for table in tables:
+        db_copy.export_table(
+            db_copy.resolve_table(table),
+            output_directory=output_directory,
+            format=format,
+            using=using,
+        )
+
+
+def export_models(
+    models: List[str] = typer.Argument(
+        ..., help="UUIDBaseModel subclasses (app_label.Model)."
+    ),
+    output_directory: Path = typer.Option(
+        os.getcwd(),
+        "-o",
+        "--output-directory",
+        help="File output directory. Default: Current working directory.",
+        dir_okay=True,
+        file_okay=False,
+    ),
+    jobs: Optional[int] = typer.Option(
+        None, "-j", "--jobs", help="Worker processes. Default: CPU count."
+    ),
+    partitions: Optional[int] = typer.Option(
+        None,
+        "-p",
+        "--partitions",
+        help="Primary key ranges per table. Default: 4 * jobs.",
+    ),
+    chunk_size: int = typer.Option(
+        2000, "--chunk-size", help="Rows fetched at once."
+    ),
+    using: str = typer.Option(
+        "default", "-u", "--using", help="Database alias."
+    ),
+):
+    """Export models to sharded JSONL files in parallel."""
+    # Imports the models, which needs configured settings.
+    from tea_django.database.export import export_model
+
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Model")
+    table.add_column("Partitions", justify="right")
+    table.add_column("Rows", justify="right")
+    table.add_column("Size (MB)", justify="right")
+    table.add_column("Seconds", justify="right")
+    for label in models:
+        start = time.perf_counter()
+        manifest = export_model(
+            db_copy.resolve_table(label).model or label,
+            output_directory=output_directory,
+            jobs=jobs,
+            partitions=partitions,
+            chunk_size=chunk_size,
+            using=using,
+        )
+        size = sum(partition.size for partition in manifest.partitions)
+        table.add_row(
+            manifest.model,
+            f"{len(manifest.partitions)}",
+            f"{manifest.rows}",
+            f"{size / 1024 / 1024:.1f}",
+            f"{time.perf_counter() - start:.1f}",
+        )
+    Console().print(table)
+
+
+def import_tables(
+    tables: List[str] = typer.Argument(
+        ..., help="Models (app_label.Model) or table names."
+    ),
+    input_directory: Path = typer.Option(
+        os.getcwd(),
+        "-i",
+        "--input-directory",
+        help="Directory with exported files. Default: Current directory.",
+        dir_okay=True,
+        file_okay=False,
+        exists=True,
+    ),
+    format: CopyFormat = typer.Option(
+        CopyFormat.binary, "-F", "--format", help="COPY data format."
+    ),
+    truncate: bool = typer.Option(
+        False, "--truncate", help="Truncate tables before importing."
+    ),
+    cascade: bool = typer.Option(
+        False,
+        "--cascade",
+        help="Truncate with CASCADE, empties referencing tables too.",
+    ),
+    using: str = typer.Option(
+        "default", "-u", "--using", help="Database alias."
+    ),
+):
+    """Import tables exported with `export-tables` using COPY.
 
-def load(filename: str = typer.Argument(..., help="Dump file to load")):
-    """Load PostgreSQL database dump."""
-    postgres = PostgreSQL()
-    postgres.load(filename=filename)
+    All tables are imported in a single transaction.
+    """
+    db_copy.import_tables(
+        [db_copy.resolve_table(table) for table in tables],
+        input_directory=input_directory,
+        format=format,
+        truncate=truncate,
+        cascade=cascade,
+        using=using,
+    )
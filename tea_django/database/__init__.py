@@ -0,0 +1,27 @@
+__all__ = ["Database", "PostgreSQL", "SQLite", "get_database"]
+
+from django.conf import settings
+
+from tea_django.errors import DatabaseError
+from tea_django.database.base import Database
+from tea_django.database.postgresql import PostgreSQL
+from tea_django.database.sqlite import SQLite
+
+
+BACKENDS = {
+    "postgresql": PostgreSQL,
+    "postgis": PostgreSQL,
+    "sqlite3": SQLite,
+    "spatialite": SQLite,
+}
+
+
+def get_database(alias: str = "default") -> Database:
+    """Create a database backend instance from the alias ENGINE setting."""
+    engine = settings.DATABASES[alias]["ENGINE"]
+    backend = BACKENDS.get(engine.rsplit(".", 1)[-1])
+    if backend is None:
+        raise DatabaseError(
+            message=f"Database engine `{engine}` is not supported."
+        )
+    return backend(alias=alias)
@@ -0,0 +1,57 @@
+import socket
+from pathlib import Path
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+
+from tea_django.database.progress import Metrics
+
+
+class Database:
+    """Base class for database backends used by `db dump` and `db load`."""
+
+    # Extension of the dump files, before the compression extension.
+    EXTENSION = ".backup"
+
+    def __init__(
+        self, alias: str = "default", metrics: Optional[Metrics] = None
+    ):
+        self.alias = alias
+        self.settings = settings.DATABASES[alias]
+        # Phase timings and progress reporting, see `Metrics`.
+        self.metrics = metrics or Metrics()
+
+    @property
+    def dump_name(self) -> str:
+        """Name of the database used in dump filenames."""
+        return self.settings["NAME"]
+
+    def dump_filename(
+        self, output_directory: Path, tag: Optional[str] = None
+    ) -> Path:
+        """Generate the dump path, without the compression extension."""
+        now = datetime.now()
+        hostname = socket.gethostname()
+        tag = f"-{tag}" if tag else ""
+        return Path(output_directory) / (
+            f"{self.dump_name}-{hostname}-{now:%Y%m%d%H%M%S}{tag}"
+            f"{self.EXTENSION}"
+        )
+
+    def dump(
+        self,
+        output_directory: Path,
+        tag: Optional[str] = None,
+        delete: bool = False,
+    ) -> str:
+        """Dump database.
+
+        Returns:
+            str: Path to the dump.
+        """
+        raise NotImplementedError
+
+    def load(self, filename):
+        """Load database from a dump."""
+        raise NotImplementedError
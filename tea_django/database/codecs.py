@@ -0,0 +1,317 @@
+"""Compression codecs for database dumps.
+
+Codecs are thin wrappers around command line compressors. They only build
+the command lines, so they can be plugged into `PostgreSQL.pipe` and
+compress or decompress streams without going through Python.
+"""
+
+__all__ = [
+    "Compression",
+    "Codec",
+    "Gzip",
+    "Zstd",
+    "Lz4",
+    "CodecStats",
+    "get_codec",
+    "detect_codec",
+    "compare_codecs",
+]
+
+import os
+import enum
+import time
+import shutil
+import threading
+import subprocess
+from dataclasses import dataclass
+from typing import Optional, List, Tuple, Dict, Type, IO
+
+from tea_django.errors import DatabaseError
+
+
+class Compression(str, enum.Enum):
+    """Available compression codecs."""
+
+    gzip = "gzip"
+    zstd = "zstd"
+    lz4 = "lz4"
+
+
+class Codec:
+    """Compression codec backed by a command line tool.
+
+    Args:
+        level: Compression level. If not provided the codec default is used.
+        threads: Number of compression threads. 0 means all available cores.
+            Codecs whose tool can't compress in parallel ignore this.
+    """
+
+    name: str = ""
+    extension: str = ""
+    command: str = ""
+    min_level: int = 1
+    max_level: int = 9
+    default_level: int = 6
+
+    def __init__(self, level: Optional[int] = None, threads: int = 0):
+        if level is None:
+            level = self.default_level
+        if not self.min_level <= level <= self.max_level:
+            raise DatabaseError(
+                message=(
+                    f"Invalid {self.name} compression level {level}. "
+                    f"Allowed: {self.min_level}-{self.max_level}."
+                )
+            )
+        self.level = level
+        self.threads = threads or os.cpu_count() or 1
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Check if the codec command line tool is installed."""
+        return shutil.which(cls.command) is not None
+
+    def compress_command(self) -> Tuple[str, List[str]]:
+        """Command that compresses stdin to stdout."""
+        raise NotImplementedError
+
+    def decompress_command(
+        self, filename: Optional[str] = None
+    ) -> Tuple[str, List[str]]:
+        """Command that decompresses a file (or stdin) to stdout."""
+        arguments = ["-d", "-c"]
+        if filename is not None:
+            arguments.append(str(filename))
+        return self.command, arguments
+
+    def __str__(self):
+        return f"{self.name}(level={self.level})"
+
+    __repr__ = __str__
+
+
+class Gzip(Codec):
+    """Gzip codec.
+
+    Uses `pigz` to compress on multiple cores if it's installed, otherwise
+    falls back to the single-threaded `gzip`. Output is compatible either way.
+    """
+
+    name = Compression.gzip.value
+    extension = ".gz"
+    command = "gzip"
+
+    def compress_command(self) -> Tuple[str, List[str]]:
+        if shutil.which("pigz") is not None:
+            return "pigz", ["-c", f"-{self.level}", "-p", self.threads]
+        return self.command, ["-c", f"-{self.level}"]
+
+
+class Zstd(Codec):
+    """Zstandard codec, compresses on multiple cores."""
+
+    name = Compression.zstd.value
+    extension = ".zst"
+    command = "zstd"
+    max_level = 19
+    default_level = 3
+
+    def compress_command(self) -> Tuple[str, List[str]]:
+        return self.command, [
+            "-c",
+            "-q",
+            f"-{self.level}",
+            f"-T{self.threads}",
+        ]
+
+    def decompress_command(
+        self, filename: Optional[str] = None
+    ) -> Tuple[str, List[str]]:
+        command, arguments = super().decompress_command(filename)
+        return command, ["-q", *arguments]
+
+
+class Lz4(Codec):
+    """LZ4 codec, trades compression ratio for very high throughput.
+
+    The lz4 command line tool compresses on a single core, `threads` is
+    ignored.
+    """
+
+    name = Compression.lz4.value
+    extension = ".lz4"
+    command = "lz4"
+    max_level = 12
+    default_level = 1
+
+    def compress_command(self) -> Tuple[str, List[str]]:
+        return self.command, ["-c", "-q", f"-{self.level}"]
+
+    def decompress_command(
+        self, filename: Optional[str] = None
+    ) -> Tuple[str, List[str]]:
+        command, arguments = super().decompress_command(filename)
+        return command, ["-q", *arguments]
+
+
+CODECS: Dict[Compression, Type[Codec]] = {
+    Compression.gzip: Gzip,
+    Compression.zstd: Zstd,
+    Compression.lz4: Lz4,
+}
+
+
+def get_codec(
+    compression: Compression = Compression.gzip,
+    level: Optional[int] = None,
+    threads: int = 0,
+) -> Codec:
+    """Create a codec instance."""
+    return CODECS[Compression(compression)](level=level, threads=threads)
+
+
+def detect_codec(filename) -> Optional[Codec]:
+    """Detect codec from the filename extension.
+
+    Returns:
+        Codec instance or `None` if the file is not compressed.
+    """
+    filename = str(filename)
+    for codec_class in CODECS.values():
+        if filename.endswith(codec_class.extension):
+            return codec_class()
+    return None
+
+
+@dataclass
+class CodecStats:
+    """Result of a single codec comparison run."""
+
+    codec: str
+    level: int
+    input_size: int
+    output_size: int
+    seconds: float
+
+    @property
+    def ratio(self) -> float:
+        """Compression ratio, input size divided by output size."""
+        return self.input_size / self.output_size if self.output_size else 0
+
+    @property
+    def throughput(self) -> float:
+        """Input throughput in bytes per second."""
+        return self.input_size / self.seconds if self.seconds else 0
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _command_line(command: str, arguments: List) -> List[str]:
+    exe = shutil.which(command)
+    if exe is None:
+        raise DatabaseError(message=f"`{command}` command is not found.")
+    return [exe, *[str(arg) for arg in arguments]]
+
+
+def _feed(source: IO, sink: IO, limit: Optional[int], counter: List[int]):
+    """Copy up to `limit` bytes from source to sink and close the sink."""
+    try:
+        while limit is None or counter[0] < limit:
+            size = CHUNK_SIZE
+            if limit is not None:
+                size = min(size, limit - counter[0])
+            chunk = source.read(size)
+            if not chunk:
+                break
+            sink.write(chunk)
+            counter[0] += len(chunk)
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            sink.close()
+        except BrokenPipeError:
+            pass
+
+
+def _measure(codec: Codec, source: IO, limit: Optional[int]) -> CodecStats:
+    process = subprocess.Popen(
+        _command_line(*codec.compress_command()),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    input_size = [0]
+    output_size = 0
+    start = time.perf_counter()
+    feeder = threading.Thread(
+        target=_feed,
+        args=(source, process.stdin, limit, input_size),
+        daemon=True,
+    )
+    feeder.start()
+    for chunk in iter(lambda: process.stdout.read(CHUNK_SIZE), b""):
+        output_size += len(chunk)
+    feeder.join()
+    exit_code = process.wait()
+    seconds = time.perf_counter() - start
+    process.stdout.close()
+    if exit_code != 0:
+        raise DatabaseError(
+            message=f"{codec.name} compression failed: {exit_code}"
+        )
+    return CodecStats(
+        codec=codec.name,
+        level=codec.level,
+        input_size=input_size[0],
+        output_size=output_size,
+        seconds=seconds,
+    )
+
+
+def compare_codecs(
+    filename,
+    codecs: Optional[List[Codec]] = None,
+    limit: Optional[int] = None,
+) -> List[CodecStats]:
+    """Compress a dump with every codec and measure ratio and throughput.
+
+    Compressed output is only counted, never written to disk. If the dump
+    itself is compressed, it's decompressed on the fly and the decompression
+    time is included in the measurements.
+
+    Args:
+        filename: Dump file to compress.
+        codecs: Codecs to compare. Default: all installed codecs with their
+            default settings.
+        limit: Only compress the first `limit` (uncompressed) bytes.
+
+    Returns:
+        List of codec statistics.
+    """
+    if codecs is None:
+        codecs = [
+            codec_class()
+            for codec_class in CODECS.values()
+            if codec_class.is_available()
+        ]
+
+    source_codec = detect_codec(filename)
+    results = []
+    for codec in codecs:
+        if source_codec is None:
+            with open(filename, "rb") as f:
+                results.append(_measure(codec, f, limit))
+            continue
+
+        decompress = subprocess.Popen(
+            _command_line(*source_codec.decompress_command(filename)),
+            stdout=subprocess.PIPE,
+        )
+        try:
+            results.append(_measure(codec, decompress.stdout, limit))
+        finally:
+            decompress.kill()
+            decompress.wait()
+            decompress.stdout.close()
+    return results
@@ -0,0 +1,179 @@
+"""Fast table export and import using PostgreSQL COPY.
+
+Data is streamed between files and the database through the Django
+connection with `COPY ... TO STDOUT` and `COPY ... FROM STDIN`, no Python
+objects are created for the rows.
+"""
+
+__all__ = [
+    "CopyFormat",
+    "Table",
+    "resolve_table",
+    "export_table",
+    "import_tables",
+]
+
+import enum
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Optional, List
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from tea_django.errors import DatabaseError
+
+
+class CopyFormat(str, enum.Enum):
+    """COPY data formats."""
+
+    binary = "binary"
+    csv = "csv"
+
+    @property
+    def extension(self) -> str:
+        """Exported file extension."""
+        return ".copy" if self == CopyFormat.binary else ".csv"
+
+    @property
+    def options(self) -> str:
+        """COPY statement options."""
+        if self == CopyFormat.binary:
+            return "FORMAT binary"
+        return "FORMAT csv, HEADER true"
+
+
+@dataclass
+class Table:
+    """Table that will be copied.
+
+    Attributes:
+        name: Database table name.
+        columns: Column names. `None` means all columns in table order.
+        model: Django model if the table was resolved from a model.
+    """
+
+    name: str
+    columns: Optional[List[str]] = None
+    model: Optional[type] = None
+
+
+def resolve_table(name: str) -> Table:
+    """Resolve a model label (`app_label.Model`) or a table name."""
+    if "." in name:
+        app_label, model_name = name.split(".", 1)
+        try:
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            # Not a model, it's probably a `schema.table` name.
+            return Table(name=name)
+        return Table(
+            name=model._meta.db_table,
+            columns=[field.column for field in model._meta.concrete_fields],
+            model=model,
+        )
+    return Table(name=name)
+
+
+def _quote_table(connection, table: Table) -> str:
+    quote_name = connection.ops.quote_name
+    return ".".join(quote_name(part) for part in table.name.split("."))
+
+
+def _copy_target(connection, table: Table) -> str:
+    name = _quote_table(connection, table)
+    if table.columns is None:
+        return name
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(quote_name(column) for column in table.columns)
+    return f"{name} ({columns})"
+
+
+def export_table(
+    table: Table,
+    output_directory: Path,
+    format: CopyFormat = CopyFormat.binary,
+    using: str = "default",
+) -> str:
+    """Export a table into a file with `COPY ... TO STDOUT`.
+
+    Args:
+        table: Table to export.
+        output_directory: Directory where the file will be written.
+        format: COPY data format.
+        using: Database alias.
+
+    Returns:
+        str: Path to the exported file.
+    """
+    connection = connections[using]
+    filename = Path(output_directory) / f"{table.name}{format.extension}"
+    target = _copy_target(connection, table)
+    sql = f"COPY {target} TO STDOUT ({format.options})"
+    try:
+        with open(filename, "wb") as f:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(sql, f)
+    except Exception:
+        filename.unlink()
+        raise
+    return str(filename)
+
+
+def import_tables(
+    tables: List[Table],
+    input_directory: Path,
+    format: CopyFormat = CopyFormat.binary,
+    truncate: bool = False,
+    cascade: bool = False,
+    chunk_size: int = 1024 * 1024,
+    using: str = "default",
+) -> List[str]:
+    """Import files created by `export_table` with `COPY ... FROM STDIN`.
+
+    All tables are imported in a single transaction, so with `truncate` they
+    are replaced atomically. Sequences of tables that belong to a model are
+    reset after the import.
+
+    Args:
+        tables: Target tables.
+        input_directory: Directory containing the exported files.
+        format: COPY data format.
+        truncate: Truncate the tables before importing.
+        cascade: Truncate with CASCADE, this also empties all tables that
+            reference the imported ones.
+        chunk_size: Size of chunks sent to the database in bytes.
+        using: Database alias.
+
+    Returns:
+        List[str]: Paths to the imported files.
+    """
+    filenames = [
+        Path(input_directory) / f"{table.name}{format.extension}"
+        for table in tables
+    ]
+    for filename in filenames:
+        if not filename.is_file():
+            raise DatabaseError(message=f"`{filename}` not found.")
+
+    connection = connections[using]
+    models = [table.model for table in tables if table.model is not None]
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            if truncate:
+                names = ", ".join(
+                    _quote_table(connection, table) for table in tables
+                )
+                cascade_sql = " CASCADE" if cascade else ""
+                cursor.execute(f"TRUNCATE {names}{cascade_sql}")
+            for table, filename in zip(tables, filenames):
+                target = _copy_target(connection, table)
+                sql = f"COPY {target} FROM STDIN ({format.options})"
+                with open(filename, "rb") as f:
+                    cursor.copy_expert(sql, f, size=chunk_size)
+            for statement in connection.ops.sequence_reset_sql(
+                no_style(), models
+            ):
+                cursor.execute(statement)
+    return [str(filename) for filename in filenames]
@@ -0,0 +1,236 @@
+"""Parallel JSONL export of `UUIDBaseModel` tables.
+
+The table is split into primary key ranges and every range is exported by a
+worker process with its own database connection::
+
+    {output_directory}/
+        {app_label.model}-0000.jsonl
+        {app_label.model}-0001.jsonl
+        ...
+        {app_label.model}.manifest.json
+
+Every line is the `column_dict` of one row, see
+`UUIDBaseQuerySet.column_dicts`, so the shards can be loaded back with
+`UUIDBaseModel.from_dicts`.
+"""
+
+__all__ = [
+    "ExportPartition",
+    "ExportManifest",
+    "partition_bounds",
+    "export_model",
+]
+
+import os
+import json
+import time
+import uuid
+import decimal
+import datetime
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, List, Callable
+
+import django
+from django.apps import apps
+from django.db import connections, router
+
+from tea_django.errors import DatabaseError
+from tea_django.models import UUIDBaseModel
+from tea_django.database.utils import atomic_output
+
+UUID_MAX = 2**128
+
+
+@dataclass
+class ExportPartition:
+    """Exported primary key range `[lower, upper)`.
+
+    Attributes:
+        index: Partition number.
+        filename: Shard file name, relative to the manifest.
+        lower: Inclusive lower bound, `None` for the first partition.
+        upper: Exclusive upper bound, `None` for the last partition.
+        rows: Number of exported rows.
+        size: Shard size in bytes.
+        seconds: Export duration.
+    """
+
+    index: int
+    filename: str
+    lower: Optional[str] = None
+    upper: Optional[str] = None
+    rows: int = 0
+    size: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class ExportManifest:
+    """Description of an exported table."""
+
+    model: str
+    database: str
+    created: datetime.datetime
+    columns: List[str]
+    partitions: List[ExportPartition] = field(default_factory=list)
+
+    @property
+    def rows(self) -> int:
+        return sum(partition.rows for partition in self.partitions)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    raise TypeError(f"Can't serialize {type(value).__name__} to JSON.")
+
+
+def partition_bounds(model, partitions: int, using: str) -> List[uuid.UUID]:
+    """Return up to `partitions - 1` primary keys that split the table.
+
+    On PostgreSQL the bounds are percentiles of the existing keys, so the
+    partitions have roughly the same number of rows whatever the key
+    distribution. Elsewhere the UUID space is split evenly, which works for
+    random UUIDs.
+    """
+    if partitions <= 1:
+        return []
+    fractions = [i / partitions for i in range(1, partitions)]
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return [uuid.UUID(int=int(UUID_MAX * f)) for f in fractions]
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT percentile_disc(%s::float8[]) WITHIN GROUP "
+            f"(ORDER BY {quote_name(model._meta.pk.column)}) "
+            f"FROM {quote_name(model._meta.db_table)}",
+            [fractions],
+        )
+        bounds = cursor.fetchone()[0] or []
+    # Small tables repeat the same keys.
+    return sorted(set(bounds))
+
+
+def _init_worker():
+    # Spawned workers start with an empty interpreter.
+    if not apps.ready:
+        django.setup()
+
+
+def _export_partition(
+    label: str,
+    partition: ExportPartition,
+    output_directory: str,
+    chunk_size: int,
+    using: str,
+) -> ExportPartition:
+    model = apps.get_model(label)
+    queryset = model.objects.using(using).order_by("pk")
+    if partition.lower is not None:
+        queryset = queryset.filter(pk__gte=partition.lower)
+    if partition.upper is not None:
+        queryset = queryset.filter(pk__lt=partition.upper)
+
+    start = time.perf_counter()
+    filename = Path(output_directory) / partition.filename
+    try:
+        with atomic_output(filename) as f:
+            for row in queryset.column_dicts(chunk_size=chunk_size):
+                line = json.dumps(
+                    row, default=_json_default, separators=(",", ":")
+                )
+                f.write(line.encode("utf-8"))
+                f.write(b"\n")
+                partition.rows += 1
+    finally:
+        connections.close_all()
+    partition.size = filename.stat().st_size
+    partition.seconds = time.perf_counter() - start
+    return partition
+
+
+def export_model(
+    model,
+    output_directory: Path,
+    jobs: Optional[int] = None,
+    partitions: Optional[int] = None,
+    chunk_size: int = 2000,
+    using: Optional[str] = None,
+    on_progress: Optional[Callable[[ExportPartition], None]] = None,
+) -> ExportManifest:
+    """Export a `UUIDBaseModel` table to sharded JSONL files in parallel.
+
+    The manifest is written last, only if all partitions were exported.
+
+    Args:
+        model: Model class.
+        output_directory: Directory where the files will be written.
+        jobs: Number of worker processes. Default: number of CPUs.
+        partitions: Number of primary key ranges. Default: `4 * jobs`, so
+            workers that finish early pick up the remaining ranges.
+        chunk_size: Number of rows fetched from the database at once.
+        using: Database alias. Default: the router's read database.
+        on_progress: Called with every exported partition.
+
+    Returns:
+        The written manifest.
+    """
+    if not (isinstance(model, type) and issubclass(model, UUIDBaseModel)):
+        raise DatabaseError(message=f"`{model}` is not a UUIDBaseModel.")
+    jobs = jobs or os.cpu_count() or 1
+    partitions = partitions or 4 * jobs
+    using = using or router.db_for_read(model)
+    on_progress = on_progress or (lambda partition: None)
+    label = model._meta.label_lower
+    os.makedirs(output_directory, exist_ok=True)
+
+    bounds = [None, *partition_bounds(model, partitions, using), None]
+    manifest = ExportManifest(
+        model=label,
+        database=using,
+        created=datetime.datetime.now(),
+        columns=list(model.column_names()),
+    )
+    tasks = [
+        ExportPartition(
+            index=i,
+            filename=f"{label}-{i:04d}.jsonl",
+            lower=None if lower is None else str(lower),
+            upper=None if upper is None else str(upper),
+        )
+        for i, (lower, upper) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+    # Forked workers must not share the connections of this process.
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker
+    ) as executor:
+        futures = [
+            executor.submit(
+                _export_partition,
+                label,
+                task,
+                str(output_directory),
+                chunk_size,
+                using,
+            )
+            for task in tasks
+        ]
+        for future in as_completed(futures):
+            partition = future.result()
+            manifest.partitions.append(partition)
+            on_progress(partition)
+    manifest.partitions.sort(key=lambda partition: partition.index)
+
+    data = asdict(manifest)
+    data["created"] = manifest.created.isoformat()
+    data["rows"] = manifest.rows
+    with atomic_output(Path(output_directory) / f"{label}.manifest.json") as f:
+        f.write(json.dumps(data, indent=2).encode("utf-8"))
+    return manifest
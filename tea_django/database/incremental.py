@@ -0,0 +1,520 @@
+"""Incremental, table level PostgreSQL dumps.
+
+Every incremental snapshot is a directory::
+
+    {database}-{hostname}-{time}{tag}.incremental/
+        manifest.json
+        pre-data.sql.gz
+        sequences.sql.gz
+        post-data.sql.gz
+        tables/{schema}.{table}.sql.gz
+
+The manifest records row counts, `pg_stat_user_tables` modification
+counters and a content checksum for every table. A table is dumped again
+only if it changed since the previous snapshot, otherwise its file is hard
+linked from the previous snapshot. If hard linking is not possible, the file
+is left out and found by following the `parent` chain of manifests on load.
+
+The counters are updated asynchronously. Since PostgreSQL 15 a backend
+flushes them at most once a second, an idle one up to 10 seconds after its
+last write and a busy one up to a minute later. Before 15 they are sent to
+a collector that may drop them. Counters of linked tables are read again at
+the end of the dump, once the idle flush delay passed, and tables whose
+counters moved are checksummed inside the snapshot. That covers the common
+case, use `verify` to checksum every table when a snapshot must never miss
+a write.
+"""
+
+__all__ = ["IncrementalDump"]
+
+import json
+import os
+import time
+import socket
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any
+
+from django.db import connections, transaction
+
+from tea_django.errors import DatabaseError
+from tea_django.database.codecs import Codec, Gzip, detect_codec
+from tea_django.database.utils import atomic_output
+
+
+TABLES_SQL = """
+SELECT schemaname, relname, n_live_tup, n_tup_ins, n_tup_upd, n_tup_del
+FROM pg_stat_user_tables
+ORDER BY schemaname, relname
+"""
+
+SEQUENCES_SQL = """
+SELECT schemaname, sequencename FROM pg_sequences
+ORDER BY schemaname, sequencename
+"""
+
+STATS_RESET_SQL = """
+SELECT coalesce(stats_reset::text, '')
+FROM pg_stat_database WHERE datname = current_database()
+"""
+
+# Order independent checksum: sum of the first 64 bits of every row md5.
+CHECKSUM_SQL = """
+SELECT
+    count(*),
+    coalesce(
+        sum(('x' || substr(md5(t::text), 1, 16))::bit(64)::bigint::numeric),
+        0
+    )::text
+FROM {table} AS t
+"""
+
+
+class IncrementalDump:
+    """Create and load incremental, table level dumps.
+
+    Args:
+        postgres: PostgreSQL instance used for running pg_dump and psql.
+        codec: Compression codec for new files. Default: gzip.
+        jobs: Number of tables dumped or loaded in parallel.
+        verify: Compute checksums even for tables whose modification counters
+            didn't change.
+    """
+
+    SUFFIX = ".incremental"
+    MANIFEST = "manifest.json"
+    VERSION = 1
+    # Seconds after which idle backends have flushed their counters.
+    STATS_DELAY = 10.0
+
+    def __init__(
+        self,
+        postgres,
+        codec: Optional[Codec] = None,
+        jobs: int = 1,
+        verify: bool = False,
+    ):
+        self.postgres = postgres
+        self.codec = codec or Gzip()
+        self.jobs = jobs
+        self.verify = verify
+
+    @classmethod
+    def is_snapshot(cls, path) -> bool:
+        """Check if the path is an incremental snapshot directory."""
+        return (Path(path) / cls.MANIFEST).is_file()
+
+    @classmethod
+    def read_manifest(cls, snapshot: Path) -> Dict[str, Any]:
+        with open(snapshot / cls.MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def find_previous(self, output_directory: Path) -> Optional[Path]:
+        """Find the latest snapshot of this database in the directory."""
+        snapshots = [
+            path
+            for path in Path(output_directory).glob(
+                f"{self.postgres.database}-*{self.SUFFIX}"
+            )
+            if self.is_snapshot(path)
+        ]
+        if len(snapshots) == 0:
+            return None
+        return max(
+            snapshots, key=lambda path: self.read_manifest(path)["created"]
+        )
+
+    # Dump
+
+    def _pgdump(self, output: Path, arguments: List[str], snapshot: str):
+        """Dump into a compressed file, see `PostgreSQL.pgdump_stream`."""
+        postgres = self.postgres
+        with atomic_output(output) as f:
+            postgres.pipe(
+                [
+                    (
+                        "pg_dump",
+                        [
+                            *postgres.db_params,
+                            "-d",
+                            postgres.database,
+                            f"--snapshot={snapshot}",
+                            *arguments,
+                        ],
+                    ),
+                    self.codec.compress_command(),
+                ],
+                stdout=f,
+            )
+
+    @staticmethod
+    def _table_filename(name: str, codec: Codec) -> str:
+        return f"tables/{quote(name, safe='')}.sql{codec.extension}"
+
+    def _read_counters(self, cursor):
+        """Read the modification counters of all tables.
+
+        Must run before the snapshot is taken. A change made between both
+        is then in the dump but counted only by the next snapshot, which
+        dumps the table again, instead of being left out of every dump.
+        """
+        cursor.execute(STATS_RESET_SQL)
+        stats_reset = cursor.fetchone()[0]
+        cursor.execute(TABLES_SQL)
+        counters = {
+            f"{schema}.{table}": values
+            for schema, table, *values in cursor.fetchall()
+        }
+        return stats_reset, counters
+
+    def _collect(
+        self,
+        cursor,
+        stats_reset: str,
+        counters: Dict[str, List[int]],
+        previous: Optional[Dict[str, Any]],
+    ):
+        """Collect table statistics and decide which tables to dump.
+
+        Returns:
+            Tables, sequences and the names of the tables whose counters
+            were trusted.
+        """
+        quote_name = connections[self.postgres.alias].ops.quote_name
+        previous_tables = previous["tables"] if previous else {}
+        # If the counters were reset since the previous snapshot, we can't
+        # trust them and have to compare checksums.
+        verify = self.verify or (
+            previous is not None and previous["stats_reset"] != stats_reset
+        )
+
+        # Tables created after the counters were read have none, they are
+        # always checksummed.
+        cursor.execute(TABLES_SQL)
+        tables = {}
+        # Tables not checksummed because their counters didn't change.
+        trusted = []
+        for schema, table, *_ in cursor.fetchall():
+            name = f"{schema}.{table}"
+            live, inserted, updated, deleted = counters.get(
+                name, (None, None, None, None)
+            )
+            entry = {
+                "schema": schema,
+                "table": table,
+                "live": live,
+                "inserted": inserted,
+                "updated": updated,
+                "deleted": deleted,
+            }
+            old = previous_tables.get(name)
+            keys = ("live", "inserted", "updated", "deleted")
+            if (
+                not verify
+                and old is not None
+                and name in counters
+                and all(old[key] == entry[key] for key in keys)
+            ):
+                entry.update(
+                    rows=old["rows"], checksum=old["checksum"], changed=False
+                )
+                trusted.append(name)
+            else:
+                rows, checksum = self._checksum(cursor, schema, table)
+                entry.update(
+                    rows=rows,
+                    checksum=checksum,
+                    changed=(
+                        old is None
+                        or old["rows"] != rows
+                        or old["checksum"] != checksum
+                    ),
+                )
+            tables[name] = entry
+
+        cursor.execute(SEQUENCES_SQL)
+        sequences = [
+            f"{quote_name(schema)}.{quote_name(sequence)}"
+            for schema, sequence in cursor.fetchall()
+        ]
+        return tables, sequences, trusted
+
+    def _checksum(self, cursor, schema: str, table: str):
+        """Return the row count and the checksum of a table."""
+        quote_name = connections[self.postgres.alias].ops.quote_name
+        cursor.execute(
+            CHECKSUM_SQL.format(
+                table=f"{quote_name(schema)}.{quote_name(table)}"
+            )
+        )
+        return cursor.fetchone()
+
+    def _recheck(
+        self,
+        cursor,
+        counters: Dict[str, List[int]],
+        read_at: float,
+        tables: Dict[str, Dict[str, Any]],
+        trusted: List[str],
+    ) -> List[str]:
+        """Find trusted tables that changed before the snapshot was taken.
+
+        Writes committed just before the counters were read may not have
+        been counted yet. The counters are read again after `STATS_DELAY`
+        and tables whose counters moved are checksummed in the snapshot.
+
+        Returns:
+            Names of the changed tables.
+        """
+        time.sleep(max(0.0, read_at + self.STATS_DELAY - time.monotonic()))
+        # Statistics are cached for the rest of the transaction otherwise.
+        cursor.execute("SELECT pg_stat_clear_snapshot()")
+        cursor.execute(TABLES_SQL)
+        current = {
+            f"{schema}.{table}": values
+            for schema, table, *values in cursor.fetchall()
+        }
+        changed = []
+        for name in trusted:
+            if current.get(name) == counters[name]:
+                continue
+            entry = tables[name]
+            rows, checksum = self._checksum(
+                cursor, entry["schema"], entry["table"]
+            )
+            if rows != entry["rows"] or checksum != entry["checksum"]:
+                entry.update(rows=rows, checksum=checksum, changed=True)
+                changed.append(name)
+        return changed
+
+    def _table_job(self, directory: Path, name: str, entry: Dict[str, Any]):
+        """Return the pg_dump job of a table that has to be dumped."""
+        quote_name = connections[self.postgres.alias].ops.quote_name
+        linked = entry.get("file")
+        if linked is not None and os.path.isfile(directory / linked):
+            # The codec, and so the filename, may differ.
+            os.remove(directory / linked)
+        entry["changed"] = True
+        entry["file"] = self._table_filename(name, self.codec)
+        table = f"{quote_name(entry['schema'])}.{quote_name(entry['table'])}"
+        return directory / entry["file"], ["--data-only", f"--table={table}"]
+
+    def _run_jobs(self, jobs, snapshot: str):
+        """Run pg_dump jobs in parallel."""
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [
+                executor.submit(self._pgdump, output, arguments, snapshot)
+                for output, arguments in jobs
+            ]
+            for future in futures:
+                future.result()
+
+    def dump(
+        self,
+        output_directory: Path,
+        tag: Optional[str] = None,
+        previous: Optional[Path] = None,
+    ) -> str:
+        """Create an incremental snapshot.
+
+        All tables are dumped from the same exported snapshot, so the
+        result is consistent even though every table is dumped separately.
+
+        Args:
+            output_directory: Directory where the snapshot will be created.
+            tag: Optional tag added to the end of the directory name.
+            previous: Previous snapshot. Default: the latest snapshot of the
+                same database in the output directory.
+
+        Returns:
+            str: Path to the snapshot directory.
+        """
+        postgres = self.postgres
+        output_directory = Path(output_directory)
+        os.makedirs(output_directory, exist_ok=True)
+        if previous is None:
+            previous = self.find_previous(output_directory)
+        previous_manifest = (
+            None if previous is None else self.read_manifest(previous)
+        )
+
+        now = datetime.now()
+        hostname = socket.gethostname()
+        tag = f"-{tag}" if tag else ""
+        directory = output_directory / (
+            f"{postgres.database}-{hostname}-{now:%Y%m%d%H%M%S}{tag}"
+            f"{self.SUFFIX}"
+        )
+        os.makedirs(directory / "tables")
+
+        ext = self.codec.extension
+        connection = connections[postgres.alias]
+        # Outside of the snapshot transaction, the isolation level must be
+        # set before its first query.
+        with connection.cursor() as cursor:
+            stats_reset, counters = self._read_counters(cursor)
+        read_at = time.monotonic()
+        with transaction.atomic(using=postgres.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"
+                )
+                cursor.execute("SELECT pg_export_snapshot()")
+                snapshot = cursor.fetchone()[0]
+                tables, sequences, trusted = self._collect(
+                    cursor, stats_reset, counters, previous_manifest
+                )
+
+            jobs = [
+                (
+                    directory / f"pre-data.sql{ext}",
+                    ["--schema-only", "--section=pre-data"],
+                ),
+                (
+                    directory / f"post-data.sql{ext}",
+                    ["--schema-only", "--section=post-data"],
+                ),
+            ]
+            if sequences:
+                jobs.append(
+                    (
+                        directory / f"sequences.sql{ext}",
+                        [
+                            "--data-only",
+                            *[f"--table={name}" for name in sequences],
+                        ],
+                    )
+                )
+            for name, entry in tables.items():
+                if not entry["changed"] and self._link(
+                    previous, previous_manifest, directory, name, entry
+                ):
+                    continue
+                jobs.append(self._table_job(directory, name, entry))
+
+            # The exported snapshot is valid only while this transaction is
+            # open, so all pg_dump runs have to finish inside it.
+            self._run_jobs(jobs, snapshot)
+            if trusted:
+                with connection.cursor() as cursor:
+                    changed = self._recheck(
+                        cursor, counters, read_at, tables, trusted
+                    )
+                self._run_jobs(
+                    [
+                        self._table_job(directory, n, tables[n])
+                        for n in changed
+                    ],
+                    snapshot,
+                )
+
+        manifest = {
+            "version": self.VERSION,
+            "database": postgres.database,
+            "created": now.isoformat(),
+            "parent": (
+                None
+                if previous is None
+                else os.path.relpath(previous, output_directory)
+            ),
+            "stats_reset": stats_reset,
+            "pre_data": f"pre-data.sql{ext}",
+            "post_data": f"post-data.sql{ext}",
+            "sequences": f"sequences.sql{ext}" if sequences else None,
+            "tables": tables,
+        }
+        with open(directory / self.MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return str(directory)
+
+    def _link(
+        self,
+        previous: Path,
+        previous_manifest: Dict[str, Any],
+        directory: Path,
+        name: str,
+        entry: Dict[str, Any],
+    ) -> bool:
+        """Reuse the unchanged table file from the previous snapshot.
+
+        Returns:
+            bool: `True` if the file was linked or can be found through the
+                manifest chain, `False` if the table has to be dumped.
+        """
+        try:
+            source = self._find_table_file(previous, previous_manifest, name)
+        except DatabaseError:
+            return False
+
+        entry["file"] = f"tables/{source.name}"
+        try:
+            os.link(source, directory / entry["file"])
+        except OSError:
+            # Different file system or no hard link support. Load will find
+            # the file by following the parent chain.
+            pass
+        return True
+
+    # Load
+
+    def _find_table_file(
+        self, snapshot: Path, manifest: Dict[str, Any], name: str
+    ) -> Path:
+        """Find the table file following the chain of parent manifests."""
+        checksum = manifest["tables"][name]["checksum"]
+        while True:
+            entry = manifest["tables"].get(name)
+            if entry is None or entry["checksum"] != checksum:
+                break
+            path = snapshot / entry["file"]
+            if path.is_file():
+                return path
+            if manifest.get("parent") is None:
+                break
+            snapshot = snapshot.parent / manifest["parent"]
+            if not self.is_snapshot(snapshot):
+                break
+            manifest = self.read_manifest(snapshot)
+        raise DatabaseError(message=f"Dump file for table `{name}` not found.")
+
+    def _psql(self, filename: Path, database: str):
+        postgres = self.postgres
+        codec = detect_codec(filename)
+        postgres.pipe(
+            [
+                codec.decompress_command(filename),
+                postgres.psql_restore(database),
+            ]
+        )
+
+    def load(self, snapshot: Path, database: Optional[str] = None):
+        """Load an incremental snapshot into an existing empty database.
+
+        Schema is created first, then the table data is loaded and finally
+        indexes and constraints are created.
+
+        Args:
+            snapshot: Snapshot directory.
+            database: Target database. Default: configured database.
+        """
+        snapshot = Path(snapshot)
+        database = database or self.postgres.database
+        manifest = self.read_manifest(snapshot)
+        files = [
+            self._find_table_file(snapshot, manifest, name)
+            for name in manifest["tables"]
+        ]
+
+        self._psql(snapshot / manifest["pre_data"], database)
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [
+                executor.submit(self._psql, filename, database)
+                for filename in files
+            ]
+            for future in futures:
+                future.result()
+        if manifest["sequences"] is not None:
+            self._psql(snapshot / manifest["sequences"], database)
+        self._psql(snapshot / manifest["post_data"], database)
@@ -0,0 +1,153 @@
+"""Parallel VACUUM, ANALYZE and REINDEX of PostgreSQL tables.
+
+Tables are processed in order of dead tuples plus modifications since the
+last analyze, so the tables the planner knows least about are handled first.
+Every statement runs in its own psql session, outside of a transaction.
+"""
+
+__all__ = ["Operation", "MaintenanceResult", "maintain"]
+
+import enum
+import time
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Callable
+
+from tea_django.errors import DatabaseError
+
+
+class Operation(str, enum.Enum):
+    """Maintenance operations."""
+
+    vacuum = "vacuum"
+    analyze = "analyze"
+    reindex = "reindex"
+
+
+TABLES_SQL = """
+SELECT
+    quote_ident(schemaname) || '.' || quote_ident(relname),
+    schemaname || '.' || relname,
+    n_dead_tup,
+    n_mod_since_analyze
+FROM pg_stat_user_tables
+ORDER BY
+    n_dead_tup + n_mod_since_analyze DESC,
+    pg_total_relation_size(relid) DESC
+"""
+
+
+@dataclass
+class MaintenanceResult:
+    """Result of maintenance of a single table."""
+
+    table: str
+    dead_tuples: int
+    modifications: int
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def _statements(table: str, operations: List[Operation]) -> List[str]:
+    statements = []
+    if Operation.vacuum in operations:
+        if Operation.analyze in operations:
+            statements.append(f"VACUUM (ANALYZE) {table}")
+        else:
+            statements.append(f"VACUUM {table}")
+    elif Operation.analyze in operations:
+        statements.append(f"ANALYZE {table}")
+    if Operation.reindex in operations:
+        statements.append(f"REINDEX TABLE CONCURRENTLY {table}")
+    return statements
+
+
+def _tables(postgres, database: str, tables: Optional[List[str]]):
+    output = postgres.run(
+        "psql",
+        [
+            *postgres.db_params,
+            "-d",
+            database,
+            "-A",
+            "-t",
+            "-F",
+            "\t",
+            "-c",
+            TABLES_SQL,
+        ],
+    )
+    result = []
+    for line in output.splitlines():
+        if line.strip() == "":
+            continue
+        quoted, name, dead, modified = line.split("\t")
+        if tables and not (name in tables or name.split(".", 1)[1] in tables):
+            continue
+        result.append((quoted, name, int(dead), int(modified)))
+    return result
+
+
+def _maintain(
+    postgres,
+    database: str,
+    quoted: str,
+    result: MaintenanceResult,
+    operations: List[Operation],
+):
+    arguments = [*postgres.db_params, "-d", database, "-v", "ON_ERROR_STOP=1"]
+    for statement in _statements(quoted, operations):
+        arguments.extend(["-c", statement])
+    start = time.perf_counter()
+    try:
+        postgres.run("psql", arguments)
+    except DatabaseError as e:
+        result.error = e.message
+    result.seconds = time.perf_counter() - start
+
+
+def maintain(
+    postgres,
+    operations: List[Operation],
+    jobs: int = 4,
+    database: Optional[str] = None,
+    tables: Optional[List[str]] = None,
+    on_progress: Optional[Callable[[MaintenanceResult], None]] = None,
+) -> List[MaintenanceResult]:
+    """Run maintenance operations on tables in parallel.
+
+    A failure on one table doesn't stop the others, check the `error` of
+    the returned results.
+
+    Args:
+        postgres: PostgreSQL instance of the maintained database.
+        operations: Operations to run on every table.
+        jobs: Number of tables processed in parallel.
+        database: Database name. Default: configured database.
+        tables: Only process these tables (`schema.table` or `table`).
+            Default: all user tables.
+        on_progress: Called with the result of every finished table.
+
+    Returns:
+        List of results in the order the tables were processed.
+    """
+    database = database or postgres.database
+    on_progress = on_progress or (lambda result: None)
+    entries = _tables(postgres, database, tables)
+    results = [
+        MaintenanceResult(table=name, dead_tuples=dead, modifications=mods)
+        for _, name, dead, mods in entries
+    ]
+
+    def run(quoted: str, result: MaintenanceResult):
+        _maintain(postgres, database, quoted, result, operations)
+        on_progress(result)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(run, entry[0], result)
+            for entry, result in zip(entries, results)
+        ]
+        for future in futures:
+            future.result()
+    return results
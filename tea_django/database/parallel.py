@@ -0,0 +1,165 @@
+"""Concurrent dumps of multiple database aliases."""
+
+__all__ = ["DumpStatus", "DumpResult", "dump_all"]
+
+import os
+import enum
+import time
+import asyncio
+from pathlib import Path
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional, List, Callable
+
+from tea_django.errors import DjangoTeaError
+from tea_django.database.codecs import Gzip
+from tea_django.database.postgresql import PostgreSQL
+
+
+class DumpStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+@dataclass
+class DumpResult:
+    """Progress and result of a single alias dump."""
+
+    alias: str
+    database: str
+    status: DumpStatus = DumpStatus.pending
+    filename: Optional[str] = None
+    size: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def _size(path: Path) -> int:
+    """Size of a file or of all files in a directory."""
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    elif path.is_file():
+        return path.stat().st_size
+    return 0
+
+
+def _output_size(filename: Path, extension: str) -> int:
+    """Current size of a dump that is being written."""
+    for path in (
+        filename,
+        Path(f"{filename}{extension}"),
+        Path(f"{filename}{extension}.part"),
+    ):
+        size = _size(path)
+        if size > 0:
+            return size
+    return 0
+
+
+async def _dump(
+    postgres: PostgreSQL,
+    semaphore: asyncio.Semaphore,
+    result: DumpResult,
+    output_directory: Path,
+    tag: Optional[str],
+    on_progress: Callable[[DumpResult], None],
+    interval: float,
+    **kwargs,
+):
+    async with semaphore:
+        result.status = DumpStatus.running
+        on_progress(result)
+        codec = kwargs.get("codec") or Gzip()
+        filename = postgres.dump_filename(output_directory, tag)
+        start = time.perf_counter()
+        task = asyncio.ensure_future(
+            postgres.adump(
+                output_directory=output_directory,
+                tag=tag,
+                filename=filename,
+                **kwargs,
+            )
+        )
+        while not task.done():
+            await asyncio.wait({task}, timeout=interval)
+            result.seconds = time.perf_counter() - start
+            result.size = _output_size(filename, codec.extension)
+            on_progress(result)
+
+        result.seconds = time.perf_counter() - start
+        try:
+            result.filename = task.result()
+            result.size = _size(Path(result.filename))
+            result.status = DumpStatus.done
+        except DjangoTeaError as e:
+            result.status = DumpStatus.failed
+            result.error = e.message
+        except Exception as e:
+            result.status = DumpStatus.failed
+            result.error = str(e)
+        on_progress(result)
+
+
+async def dump_all(
+    output_directory: Path,
+    tag: Optional[str] = None,
+    aliases: Optional[List[str]] = None,
+    concurrency: int = 4,
+    on_progress: Optional[Callable[[DumpResult], None]] = None,
+    interval: float = 0.5,
+    **kwargs,
+) -> List[DumpResult]:
+    """Dump multiple PostgreSQL databases concurrently.
+
+    A failed dump doesn't stop the other ones, check the status of the
+    returned results.
+
+    Args:
+        output_directory: Directory where the dumps will be written.
+        tag: Optional tag added to the end of the filenames.
+        aliases: Database aliases. Default: all PostgreSQL aliases.
+        concurrency: Maximal number of dumps running at the same time.
+        on_progress: Called with the updated result whenever the status or
+            the size of a dump changes.
+        interval: Progress polling interval in seconds.
+        kwargs: Other arguments passed to `PostgreSQL.dump`.
+
+    Returns:
+        List of dump results in the same order as aliases.
+    """
+    aliases = PostgreSQL.aliases() if aliases is None else aliases
+    on_progress = on_progress or (lambda result: None)
+    databases = [PostgreSQL(alias=alias) for alias in aliases]
+    results = [
+        DumpResult(alias=postgres.alias, database=postgres.database)
+        for postgres in databases
+    ]
+
+    # Dump filenames only contain the database name, add the alias to the
+    # tag if multiple aliases point to databases with the same name.
+    names = Counter(postgres.database for postgres in databases)
+    os.makedirs(output_directory, exist_ok=True)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    await asyncio.gather(
+        *[
+            _dump(
+                postgres,
+                semaphore,
+                result,
+                output_directory=Path(output_directory),
+                tag=(
+                    "-".join(filter(None, [postgres.alias, tag]))
+                    if names[postgres.database] > 1
+                    else tag
+                ),
+                on_progress=on_progress,
+                interval=interval,
+                **kwargs,
+            )
+            for postgres, result in zip(databases, results)
+        ]
+    )
+    return results
@@ -1,13 +1,26 @@
 import os
+import enum
+import time
+import asyncio
+import functools
 import shutil
-import socket
+import tempfile
+import threading
+import subprocess
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Union, List
+from typing import Optional, Union, List, Tuple, Callable, IO
 
 from django.conf import settings
+from django.db import connections
 from tea.process import execute
 from tea_django.errors import DatabaseError
+from tea_django.database.base import Database
+from tea_django.database.codecs import CHUNK_SIZE, Codec, Gzip, detect_codec
+from tea_django.database.incremental import IncrementalDump
+from tea_django.database.maintenance import Operation, maintain
+from tea_django.database.store import DumpStore
+from tea_django.database.progress import Metrics, copy_stream
+from tea_django.database.utils import atomic_output
 
 
 class PostgreSQLError(DatabaseError):
@@ -32,18 +45,70 @@ class PostgreSQLError(DatabaseError):
         super().__init__(message=message)
 
 
-class PostgreSQL:
+Arguments = Optional[Union[str, List[str]]]
+
+
+class DumpFormat(str, enum.Enum):
+    """Dump formats.
+
+    `plain`, `custom` and `directory` are pg_dump output formats,
+    `incremental` is a table level dump, see `IncrementalDump`.
+    """
+
+    plain = "plain"
+    custom = "custom"
+    directory = "directory"
+    incremental = "incremental"
+
+    @property
+    def flag(self) -> str:
+        """pg_dump `-F` flag value."""
+        return self.value[0]
+
+
+class PostgreSQL(Database):
     """Class for manipulating PostgreSQL database."""
 
+    # First bytes of a custom format archive.
+    CUSTOM_FORMAT_MAGIC = b"PGDMP"
+
     DB_DUMP_CREATE = [
         "DROP DATABASE IF EXISTS {database}",
         "CREATE DATABASE {database}",
         "GRANT ALL PRIVILEGES ON DATABASE {database} TO {user}",
     ]
 
-    def __init__(self):
+    # Suffixes of the scratch database used for zero-downtime loads and of
+    # the previous database kept as a rollback target.
+    SCRATCH_SUFFIX = "_restore"
+    PREVIOUS_SUFFIX = "_previous"
+
+    # Rename statements run in a single transaction, so either all of them
+    # succeed or the databases are left as they were.
+    DB_SWAP = (
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+        "WHERE datname = '{database}' AND pid <> pg_backend_pid(); "
+        "ALTER DATABASE {database} RENAME TO {previous}; "
+        "ALTER DATABASE {scratch} RENAME TO {database}"
+    )
+    DB_ROLLBACK = (
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+        "WHERE datname = '{database}' AND pid <> pg_backend_pid(); "
+        "ALTER DATABASE {database} RENAME TO {scratch}; "
+        "ALTER DATABASE {previous} RENAME TO {database}; "
+        "ALTER DATABASE {scratch} RENAME TO {previous}"
+    )
+    # Terminated backends exit asynchronously, so the rename may have to be
+    # retried a few times.
+    SWAP_RETRIES = 10
+    SWAP_RETRY_DELAY = 0.5
+
+    def __init__(
+        self, alias: str = "default", metrics: Optional[Metrics] = None
+    ):
+        super().__init__(alias=alias, metrics=metrics)
         # Database parameters
-        db = settings.DATABASES["default"]
+        db = self.settings
         self.host = db["HOST"]
         self.port = db["PORT"]
         self.user = db["USER"]
@@ -53,17 +118,68 @@ class PostgreSQL:
         self.db_params = ["-h", self.host, "-p", self.port, "-U", self.user]
         self.env = {"PGPASSWORD": self.password}
 
-    def run(self, command: str, arguments: Optional[Union[str, List[str]]]):
+    @staticmethod
+    def aliases() -> List[str]:
+        """Return aliases of all configured PostgreSQL databases."""
+        return [
+            alias
+            for alias, db in settings.DATABASES.items()
+            if "postgresql" in db["ENGINE"] or "postgis" in db["ENGINE"]
+        ]
+
+    @property
+    def process_env(self):
+        """Full environment for subprocesses."""
+        return {
+            **os.environ,
+            **{key: str(value) for key, value in self.env.items()},
+        }
+
+    @staticmethod
+    def _pipeline_error(
+        commands: List[List[str]],
+        exit_codes: List[int],
+        stderrs: List[IO],
+        output: Optional[IO] = None,
+    ) -> Optional[PostgreSQLError]:
+        """Create an error for the last failed command of a pipeline.
+
+        If multiple commands fail, the last one is reported, because upstream
+        commands usually fail only as a consequence (broken pipe) of a
+        downstream failure.
+        """
+        for i in reversed(range(len(commands))):
+            if exit_codes[i] == 0:
+                continue
+            captured = None
+            if output is not None and i == len(commands) - 1:
+                output.seek(0)
+                captured = output.read().decode("utf-8", "replace")
+            stderrs[i].seek(0)
+            return PostgreSQLError(
+                command=f"{commands[i]}",
+                exit_code=exit_codes[i],
+                stdout=captured,
+                stderr=stderrs[i].read().decode("utf-8", "replace"),
+            )
+        return None
+
+    @staticmethod
+    def _command(command: str, arguments: Arguments) -> List[str]:
+        """Resolve the executable and build the full command line."""
         exe = shutil.which(command)
         if exe is None:
             raise DatabaseError(message=f"`{command}` command is not found.")
 
         if arguments is None:
-            command = [exe]
+            return [exe]
         elif not isinstance(arguments, (list, tuple)):
-            command = [exe, str(arguments)]
+            return [exe, str(arguments)]
         else:
-            command = [exe, *[str(arg) for arg in arguments]]
+            return [exe, *[str(arg) for arg in arguments]]
+
+    def run(self, command: str, arguments: Arguments) -> str:
+        command = self._command(command, arguments)
         exit_code, stdout, stderr = execute(command, env=self.env)
         if exit_code != 0:
             raise PostgreSQLError(
@@ -72,18 +188,252 @@ class PostgreSQL:
                 stdout=stdout,
                 stderr=stderr,
             )
+        return stdout
+
+    def _meters(self, *meters):
+        """Return pipe meters only if progress is reported.
+
+        Metered streams are copied through a Python thread, without them
+        the processes are connected directly by OS pipes.
+        """
+        return list(meters) if self.metrics.enabled else None
+
+    def pipe(
+        self,
+        commands: List[Tuple[str, Arguments]],
+        stdin: Optional[IO] = None,
+        stdout: Optional[IO] = None,
+        meters: Optional[List[Optional[Callable[[bytes], None]]]] = None,
+    ):
+        """Run commands connected into a pipeline.
+
+        Data flows between the processes through OS pipes, so memory usage
+        is bounded by the pipe buffers no matter how big the stream is.
+
+        Args:
+            commands: List of (command, arguments) tuples.
+            stdin: File object used as the input of the first command.
+            stdout: File object used as the output of the last command. If
+                not provided, the output is captured and reported on error.
+            meters: Optional callback for every command, called with the
+                chunks of its input. Metered input is copied through a
+                thread instead of being connected directly.
+
+        Raises:
+            PostgreSQLError: If any of the commands exits with a non-zero
+                exit code.
+        """
+        # Like `run`, capture the output if it's not redirected.
+        output = tempfile.TemporaryFile() if stdout is None else stdout
+        meters = meters or [None] * len(commands)
+        processes = []
+        stderrs = []
+        threads = []
+        errors = []
+        try:
+            for i, (command, arguments) in enumerate(commands):
+                last = i == len(commands) - 1
+                upstream = processes[-1].stdout if processes else stdin
+                meter = meters[i] if upstream is not None else None
+                stderr = tempfile.TemporaryFile()
+                stderrs.append(stderr)
+                process = subprocess.Popen(
+                    self._command(command, arguments),
+                    stdin=upstream if meter is None else subprocess.PIPE,
+                    stdout=output if last else subprocess.PIPE,
+                    stderr=stderr,
+                    env=self.process_env,
+                )
+                if meter is not None:
+                    thread = threading.Thread(
+                        target=copy_stream,
+                        args=(upstream, process.stdin, meter, errors),
+                        kwargs={"close_source": bool(processes)},
+                        daemon=True,
+                    )
+                    thread.start()
+                    threads.append(thread)
+                elif processes:
+                    # Close our copy of the pipe, so the upstream process
+                    # receives SIGPIPE if the downstream one exits early.
+                    processes[-1].stdout.close()
+                processes.append(process)
+
+            exit_codes = [process.wait() for process in processes]
+            for thread in threads:
+                thread.join()
+            error = self._pipeline_error(
+                [process.args for process in processes],
+                exit_codes,
+                stderrs,
+                output=output if stdout is None else None,
+            )
+            if error is not None:
+                raise error
+            if errors:
+                raise errors[0]
+        finally:
+            for process in processes:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+            for thread in threads:
+                thread.join()
+            for stderr in stderrs:
+                stderr.close()
+            if stdout is None:
+                output.close()
+
+    async def arun(self, command: str, arguments: Arguments) -> str:
+        """Async version of `run`."""
+        command = self._command(command, arguments)
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=self.process_env,
+        )
+        stdout, stderr = await process.communicate()
+        stdout = stdout.decode("utf-8", "replace")
+        if process.returncode != 0:
+            raise PostgreSQLError(
+                command=f"{command}",
+                exit_code=process.returncode,
+                stdout=stdout,
+                stderr=stderr.decode("utf-8", "replace"),
+            )
+        return stdout
 
-    def gzip(self, filename, action="gzip"):
-        """Run gzip or gunzip."""
-        if action == "gzip":
-            self.run("gzip", filename)
-        elif action == "gunzip":
-            self.run("gunzip", filename)
+    async def apipe(
+        self,
+        commands: List[Tuple[str, Arguments]],
+        stdin: Optional[IO] = None,
+        stdout: Optional[IO] = None,
+    ):
+        """Async version of `pipe`.
 
-    def pgdump(self, filename):
-        """Run pgdump."""
-        params = [*self.db_params, "-d", self.database, "-f", filename]
-        self.run("pg_dump", params)
+        Processes are connected with OS pipes exactly like in `pipe`, the
+        event loop only waits for them to finish.
+        """
+        output = tempfile.TemporaryFile() if stdout is None else stdout
+        command_lines = [
+            self._command(command, arguments)
+            for command, arguments in commands
+        ]
+        processes = []
+        stderrs = []
+        upstream = stdin
+        try:
+            for i, command_line in enumerate(command_lines):
+                last = i == len(command_lines) - 1
+                if last:
+                    downstream = output
+                else:
+                    read_fd, downstream = os.pipe()
+                stderr = tempfile.TemporaryFile()
+                stderrs.append(stderr)
+                try:
+                    process = await asyncio.create_subprocess_exec(
+                        *command_line,
+                        stdin=upstream,
+                        stdout=downstream,
+                        stderr=stderr,
+                        env=self.process_env,
+                    )
+                except BaseException:
+                    if not last:
+                        os.close(read_fd)
+                    raise
+                finally:
+                    # The child process holds its own copies of the pipe.
+                    if not last:
+                        os.close(downstream)
+                    if i > 0:
+                        os.close(upstream)
+                upstream = None if last else read_fd
+                processes.append(process)
+
+            exit_codes = [await process.wait() for process in processes]
+            error = self._pipeline_error(
+                command_lines,
+                exit_codes,
+                stderrs,
+                output=output if stdout is None else None,
+            )
+            if error is not None:
+                raise error
+        finally:
+            for process in processes:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+            for stderr in stderrs:
+                stderr.close()
+            if stdout is None:
+                output.close()
+
+    def compress(self, filename, codec: Codec) -> str:
+        """Compress a file and remove the original.
+
+        Returns:
+            str: Path to the compressed file.
+        """
+        output = f"{filename}{codec.extension}"
+        with open(filename, "rb") as src, atomic_output(output) as dst:
+            self.pipe(
+                [codec.compress_command()],
+                stdin=src,
+                stdout=dst,
+                meters=self._meters(self.metrics.advance),
+            )
+        os.remove(filename)
+        return output
+
+    def pgdump(
+        self,
+        filename,
+        format: DumpFormat = DumpFormat.plain,
+        jobs: int = 1,
+    ):
+        """Run pgdump.
+
+        Args:
+            filename: Output file or directory for the directory format.
+            format: pg_dump output format.
+            jobs: Number of parallel jobs. Only the directory format supports
+                parallel dumps.
+        """
+        self.run("pg_dump", self._pgdump_arguments(filename, format, jobs))
+
+    def _pgdump_arguments(
+        self, filename, format: DumpFormat, jobs: int
+    ) -> List[str]:
+        params = [*self.db_params, "-d", self.database, "-F", format.flag]
+        if format == DumpFormat.directory and jobs > 1:
+            params.extend(["-j", jobs])
+        params.extend(["-f", filename])
+        return params
+
+    def pgdump_stream(self, filename, codec: Optional[Codec] = None):
+        """Run pgdump and compress the output in a single pass.
+
+        The compressed dump is written to a temporary `.part` file which is
+        renamed only after both pg_dump and the compressor finished
+        successfully, so a failed dump never leaves a truncated archive
+        behind.
+        """
+        codec = codec or Gzip()
+        output = f"{filename}{codec.extension}"
+        with atomic_output(output) as f:
+            self.pipe(
+                [
+                    ("pg_dump", [*self.db_params, "-d", self.database]),
+                    codec.compress_command(),
+                ],
+                stdout=f,
+                meters=self._meters(None, self.metrics.feed),
+            )
+        return output
 
     def psql(self, command=None, filename=None, database="postgres"):
         """Run psql command."""
@@ -92,26 +442,169 @@ class PostgreSQL:
         elif filename is not None:
             self.run("psql", [*self.db_params, "-d", database, "-f", filename])
 
-    def delete_and_create(self):
+    def psql_restore(self, database: str) -> Tuple[str, List[str]]:
+        """Return a psql command that runs SQL from stdin into a database.
+
+        psql exits with 0 even if statements fail, unless `ON_ERROR_STOP`
+        is set. With it a restore stops at the first error and fails.
+        """
+        return (
+            "psql",
+            [*self.db_params, "-v", "ON_ERROR_STOP=1", "-d", database],
+        )
+
+    def database_exists(self, database: str) -> bool:
+        """Check if the database exists."""
+        output = self.run(
+            "psql",
+            [
+                *self.db_params,
+                "-d",
+                "postgres",
+                "-A",
+                "-t",
+                "-c",
+                f"SELECT 1 FROM pg_database WHERE datname = '{database}'",
+            ],
+        )
+        return output.strip() == "1"
+
+    def estimate_size(self) -> Optional[int]:
+        """Estimate the size of a plain dump from the size of the tables.
+
+        Returns:
+            Size in bytes or `None` if progress is not reported.
+        """
+        if not self.metrics.enabled:
+            return None
+        output = self.run(
+            "psql",
+            [
+                *self.db_params,
+                "-d",
+                self.database,
+                "-A",
+                "-t",
+                "-c",
+                "SELECT coalesce(sum(pg_table_size(relid)), 0) "
+                "FROM pg_stat_user_tables",
+            ],
+        )
+        return int(output.strip())
+
+    def pgrestore(self, filename, database=None, jobs: int = 1):
+        """Run pg_restore on a custom or directory format archive."""
+        params = [*self.db_params, "-d", database or self.database]
+        if jobs > 1:
+            params.extend(["-j", jobs])
+        params.append(filename)
+        self.run("pg_restore", params)
+
+    @classmethod
+    def detect_format(cls, filename) -> DumpFormat:
+        """Detect the format of a dump file or directory.
+
+        Compressed files are inspected by decompressing only their first few
+        bytes, nothing is written to disk.
+        """
+        if IncrementalDump.is_snapshot(filename):
+            return DumpFormat.incremental
+
+        if os.path.isdir(filename):
+            if not os.path.isfile(os.path.join(filename, "toc.dat")):
+                raise DatabaseError(
+                    message=f"`{filename}` is not a directory format dump."
+                )
+            return DumpFormat.directory
+
+        size = len(cls.CUSTOM_FORMAT_MAGIC)
+        codec = detect_codec(filename)
+        if codec is None:
+            with open(filename, "rb") as f:
+                magic = f.read(size)
+        else:
+            process = subprocess.Popen(
+                cls._command(*codec.decompress_command(filename)),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                magic = process.stdout.read(size)
+            finally:
+                process.kill()
+                process.wait()
+                process.stdout.close()
+        if magic == cls.CUSTOM_FORMAT_MAGIC:
+            return DumpFormat.custom
+        return DumpFormat.plain
+
+    def delete_and_create(self, database: Optional[str] = None):
         """Delete and create a fresh database."""
+        database = database or self.database
         for command in self.DB_DUMP_CREATE:
-            self.psql(command.format(database=self.database, user=self.user))
+            self.psql(command.format(database=database, user=self.user))
 
-    def dump(
+    def _swap(self, statement: str):
+        """Block new connections and run the rename statement."""
+        names = {
+            "database": self.database,
+            "scratch": f"{self.database}{self.SCRATCH_SUFFIX}",
+            "previous": f"{self.database}{self.PREVIOUS_SUFFIX}",
+        }
+        # Our own connection would be terminated anyway.
+        connections[self.alias].close()
+        self.psql(f"ALTER DATABASE {self.database} ALLOW_CONNECTIONS false")
+        try:
+            for attempt in range(self.SWAP_RETRIES):
+                try:
+                    self.psql(statement.format(**names))
+                    break
+                except PostgreSQLError:
+                    if attempt == self.SWAP_RETRIES - 1:
+                        raise
+                    time.sleep(self.SWAP_RETRY_DELAY)
+        finally:
+            # After a successful swap both databases accept connections, the
+            # previous one as a rollback target. After a failed one the live
+            # database is left as it was.
+            for database in (self.database, names["previous"]):
+                if self.database_exists(database):
+                    self.psql(
+                        f"ALTER DATABASE {database} ALLOW_CONNECTIONS true"
+                    )
+
+    def swap(self):
+        """Replace the live database with the restored scratch database.
+
+        The live database is renamed to `{database}_previous` and kept as a
+        rollback target, the existing previous database is dropped.
+        """
+        previous = f"{self.database}{self.PREVIOUS_SUFFIX}"
+        if not self.database_exists(self.database):
+            scratch = f"{self.database}{self.SCRATCH_SUFFIX}"
+            self.psql(f"ALTER DATABASE {scratch} RENAME TO {self.database}")
+            return
+
+        self.psql(f"DROP DATABASE IF EXISTS {previous}")
+        self._swap(self.DB_SWAP)
+
+    def rollback(self):
+        """Swap the live and the previous database."""
+        previous = f"{self.database}{self.PREVIOUS_SUFFIX}"
+        if not self.database_exists(previous):
+            raise DatabaseError(message=f"`{previous}` database not found.")
+        self._swap(self.DB_ROLLBACK)
+
+    def _prepare_dump(
         self,
         output_directory: Path,
-        tag: Optional[str] = None,
-        delete: bool = False,
-    ):
-        """Dump database."""
-        now = datetime.now()
-        hostname = socket.gethostname()
-        tag = f"-{tag}" if tag else ""
-
-        filename = (
-            output_directory
-            / f"{self.database}-{hostname}-{now:%Y%m%d%H%M%S}{tag}.backup"
-        )
+        tag: Optional[str],
+        delete: bool,
+        codec: Codec,
+        filename: Optional[Path] = None,
+    ) -> Path:
+        """Create the output directory and delete existing dumps."""
+        filename = filename or self.dump_filename(output_directory, tag)
 
         # Create output directory if it doesn't exist.
         os.makedirs(output_directory, exist_ok=True)
@@ -119,19 +612,331 @@ class PostgreSQL:
         # Delete backup file if exists
         if delete and os.path.isfile(filename):
             os.remove(filename)
-        if delete and os.path.isfile(f"{filename}.gz"):
-            os.remove(f"{filename}.gz")
-
-        self.pgdump(filename)
-        self.gzip(filename, action="gzip")
-        return f"{filename}.gz"
-
-    def load(self, filename):
-        """Load database."""
-        filename_without_ext, ext = os.path.splitext(filename)
-        if ext == ".gz":
-            self.gzip(filename, action="gunzip")
-            filename = filename_without_ext
-
-        self.delete_and_create()
-        self.psql(filename=filename, database=self.database)
+        if delete and os.path.isfile(f"{filename}{codec.extension}"):
+            os.remove(f"{filename}{codec.extension}")
+        if delete and os.path.isdir(filename):
+            shutil.rmtree(filename)
+        return filename
+
+    def dump(
+        self,
+        output_directory: Path,
+        tag: Optional[str] = None,
+        delete: bool = False,
+        stream: bool = True,
+        format: DumpFormat = DumpFormat.plain,
+        jobs: int = 1,
+        codec: Optional[Codec] = None,
+        filename: Optional[Path] = None,
+        verify: bool = False,
+    ):
+        """Dump database.
+
+        Args:
+            output_directory: Directory where the dump will be written.
+            tag: Optional tag added to the end of the filename.
+            delete: Delete the backup file if it already exists.
+            stream: Pipe pg_dump output directly into the compressor instead
+                of writing an uncompressed file first. Only used for the
+                plain format.
+            format: Dump format. Custom and directory formats are compressed
+                by pg_dump itself.
+            jobs: Number of parallel jobs for the directory and incremental
+                formats.
+            codec: Compression codec for the plain format. Default: gzip.
+            filename: Dump path without the compression extension. Default:
+                see `dump_filename`. Not used for incremental dumps.
+            verify: Checksum every table of an incremental dump, instead of
+                trusting the asynchronously updated modification counters.
+
+        Returns:
+            str: Path to the dump file or directory.
+        """
+        codec = codec or Gzip()
+
+        if format == DumpFormat.incremental:
+            with self.metrics.phase("dump"):
+                return IncrementalDump(
+                    self, codec=codec, jobs=jobs, verify=verify
+                ).dump(output_directory=output_directory, tag=tag)
+
+        filename = self._prepare_dump(
+            output_directory, tag, delete, codec, filename=filename
+        )
+
+        if format != DumpFormat.plain:
+            with self.metrics.phase("dump"):
+                self.pgdump(filename, format=format, jobs=jobs)
+            return str(filename)
+
+        if stream:
+            with self.metrics.phase("dump", total=self.estimate_size()):
+                return self.pgdump_stream(filename, codec=codec)
+
+        with self.metrics.phase("dump"):
+            self.pgdump(filename)
+        with self.metrics.phase("compress", total=os.path.getsize(filename)):
+            return self.compress(filename, codec=codec)
+
+    async def adump(
+        self,
+        output_directory: Path,
+        tag: Optional[str] = None,
+        delete: bool = False,
+        stream: bool = True,
+        format: DumpFormat = DumpFormat.plain,
+        jobs: int = 1,
+        codec: Optional[Codec] = None,
+        filename: Optional[Path] = None,
+        verify: bool = False,
+    ):
+        """Async version of `dump`.
+
+        pg_dump and the compressor run as asyncio subprocesses. Incremental
+        and non-streaming dumps fall back to `dump` in a worker thread.
+        """
+        codec = codec or Gzip()
+        if format == DumpFormat.incremental or (
+            format == DumpFormat.plain and not stream
+        ):
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                None,
+                functools.partial(
+                    self.dump,
+                    output_directory=output_directory,
+                    tag=tag,
+                    delete=delete,
+                    stream=stream,
+                    format=format,
+                    jobs=jobs,
+                    codec=codec,
+                    filename=filename,
+                    verify=verify,
+                ),
+            )
+
+        filename = self._prepare_dump(
+            output_directory, tag, delete, codec, filename=filename
+        )
+
+        if format != DumpFormat.plain:
+            await self.arun(
+                "pg_dump", self._pgdump_arguments(filename, format, jobs)
+            )
+            return str(filename)
+
+        output = f"{filename}{codec.extension}"
+        with atomic_output(output) as f:
+            await self.apipe(
+                [
+                    ("pg_dump", [*self.db_params, "-d", self.database]),
+                    codec.compress_command(),
+                ],
+                stdout=f,
+            )
+        return output
+
+    def restore(self, filename, database: Optional[str] = None, jobs=1):
+        """Restore a dump into an existing empty database.
+
+        The dump format is detected automatically. Plain SQL dumps are
+        loaded with psql, custom and directory format dumps with pg_restore.
+        Incremental snapshots are rebuilt from their chain of manifests.
+
+        Compressed dumps are decompressed on the fly and streamed into
+        psql/pg_restore, so the archive is left untouched and no temporary
+        uncompressed file is written. The codec is detected from the file
+        extension.
+
+        Args:
+            filename: Dump file or directory.
+            database: Target database. Default: configured database.
+            jobs: Number of parallel restore jobs. pg_restore can't run
+                parallel jobs when reading from a stream, so this is ignored
+                for compressed custom format dumps.
+        """
+        database = database or self.database
+        format = self.detect_format(filename)
+        codec = detect_codec(filename)
+
+        if format == DumpFormat.incremental:
+            IncrementalDump(self, jobs=jobs).load(filename, database=database)
+        elif codec is not None:
+            # Progress is measured on the compressed file, the current
+            # table on the decompressed stream.
+            if format == DumpFormat.plain:
+                restore = self.psql_restore(database)
+            else:
+                restore = ("pg_restore", [*self.db_params, "-d", database])
+            self.metrics.update(total=os.path.getsize(filename))
+            with open(filename, "rb") as f:
+                self.pipe(
+                    [codec.decompress_command(), restore],
+                    stdin=f,
+                    meters=self._meters(
+                        self.metrics.advance, self.metrics.scan
+                    ),
+                )
+        elif format == DumpFormat.plain:
+            self.metrics.update(total=os.path.getsize(filename))
+            with open(filename, "rb") as f:
+                self.pipe(
+                    [self.psql_restore(database)],
+                    stdin=f,
+                    meters=self._meters(self.metrics.feed),
+                )
+        else:
+            self.pgrestore(filename, database=database, jobs=jobs)
+
+    def analyze(self, database: Optional[str] = None, jobs: int = 1):
+        """Analyze all tables in parallel, most modified tables first."""
+        results = maintain(
+            self, [Operation.analyze], jobs=jobs, database=database
+        )
+        for result in results:
+            if result.error is not None:
+                raise DatabaseError(
+                    message=(
+                        f"Failed to analyze `{result.table}`: {result.error}"
+                    )
+                )
+
+    def load(
+        self,
+        filename,
+        jobs: int = 1,
+        swap: bool = False,
+        analyze: bool = False,
+    ):
+        """Load database.
+
+        Args:
+            filename: Dump file or directory, see `restore`.
+            jobs: Number of parallel restore and analyze jobs.
+            swap: Restore into a scratch database, analyze it and then swap
+                it with the live database. Downtime is limited to the swap
+                itself and the live database is untouched if the restore
+                fails. The replaced database is kept as a rollback target.
+            analyze: Analyze the tables after the restore, so the planner
+                has statistics before the first queries. Always done with
+                `swap`.
+        """
+        # Fail before touching any database if the dump is not readable.
+        self.detect_format(filename)
+        self._load(
+            lambda database: self.restore(
+                filename, database=database, jobs=jobs
+            ),
+            jobs=jobs,
+            swap=swap,
+            analyze=analyze,
+        )
+
+    def _load(
+        self,
+        restore: Callable[[str], None],
+        jobs: int,
+        swap: bool,
+        analyze: bool,
+    ):
+        """Recreate the database, or a scratch one, and restore into it."""
+        metrics = self.metrics
+        if not swap:
+            with metrics.phase("drop/create"):
+                self.delete_and_create()
+            with metrics.phase("restore"):
+                restore(self.database)
+            if analyze:
+                with metrics.phase("analyze"):
+                    self.analyze(jobs=jobs)
+            return
+
+        scratch = f"{self.database}{self.SCRATCH_SUFFIX}"
+        with metrics.phase("drop/create"):
+            self.delete_and_create(database=scratch)
+        try:
+            with metrics.phase("restore"):
+                restore(scratch)
+            with metrics.phase("analyze"):
+                self.analyze(database=scratch, jobs=jobs)
+        except Exception:
+            self.psql(f"DROP DATABASE IF EXISTS {scratch}")
+            raise
+        with metrics.phase("swap"):
+            self.swap()
+
+    def dump_to_store(self, store: DumpStore, tag: Optional[str] = None):
+        """Dump the database in plain format into a deduplicating store.
+
+        Args:
+            store: Dump store.
+            tag: Optional tag added to the end of the snapshot name.
+
+        Returns:
+            str: Snapshot name.
+        """
+        name = self.dump_filename(store.root, tag).stem
+        command = self._command("pg_dump", [*self.db_params, self.database])
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                env=self.process_env,
+            )
+            try:
+                with self.metrics.phase(
+                    "dump", total=self.estimate_size()
+                ), store.writer(name, database=self.database) as writer:
+                    for data in iter(
+                        lambda: process.stdout.read(CHUNK_SIZE), b""
+                    ):
+                        writer.write(data)
+                        if self.metrics.enabled:
+                            self.metrics.feed(data)
+                    # Don't write the manifest of an incomplete dump.
+                    error = self._pipeline_error(
+                        [command], [process.wait()], [stderr]
+                    )
+                    if error is not None:
+                        raise error
+            finally:
+                process.stdout.close()
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+        return name
+
+    def load_snapshot(
+        self,
+        store: DumpStore,
+        name: str,
+        jobs: int = 1,
+        swap: bool = False,
+        analyze: bool = False,
+    ):
+        """Load a snapshot from a deduplicating store.
+
+        The snapshot is reassembled on the fly and streamed into psql.
+
+        Args:
+            store: Dump store.
+            name: Snapshot name.
+            jobs: Number of parallel analyze jobs.
+            swap: Restore into a scratch database and swap, see `load`.
+            analyze: Analyze the tables after the restore, see `load`.
+        """
+        # Fail before touching any database if the snapshot doesn't exist.
+        snapshot = store.get(name)
+
+        def restore(database: str):
+            self.metrics.update(total=snapshot.size)
+            with store.open(name) as stream:
+                self.pipe(
+                    [self.psql_restore(database)],
+                    stdin=stream,
+                    meters=self._meters(self.metrics.feed),
+                )
+
+        self._load(restore, jobs=jobs, swap=swap, analyze=analyze)
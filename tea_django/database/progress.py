@@ -0,0 +1,204 @@
+"""Progress reporting and phase timings for dumps and loads.
+
+Every database backend has a `Metrics` instance. Long running operations
+are split into phases (dump, compress, drop/create, restore, ...), and
+while a phase is running the bytes flowing through it are reported to the
+`on_progress` callback::
+
+    postgres = PostgreSQL()
+    postgres.metrics = Metrics(on_progress=lambda event: print(event))
+    postgres.dump(output_directory)
+    print(postgres.metrics.timings)
+"""
+
+__all__ = ["ProgressEvent", "Metrics", "copy_stream"]
+
+import time
+import threading
+import contextlib
+from dataclasses import dataclass
+from typing import Optional, Dict, Callable, Iterator, IO, List
+
+CHUNK_SIZE = 1024 * 1024
+
+# Start of the data of a table in a plain SQL dump.
+COPY = b"\nCOPY "
+
+
+@dataclass
+class ProgressEvent:
+    """State of the running phase.
+
+    Attributes:
+        phase: Phase name.
+        processed: Bytes processed so far.
+        total: Expected number of bytes, `None` if it's not known.
+        elapsed: Seconds since the start of the phase.
+        table: Table that is currently processed, if it can be determined.
+        finished: `True` for the last event of the phase.
+    """
+
+    phase: str
+    processed: int = 0
+    total: Optional[int] = None
+    elapsed: float = 0.0
+    table: Optional[str] = None
+    finished: bool = False
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second."""
+        return self.processed / self.elapsed if self.elapsed else 0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until the end of the phase."""
+        if self.total is None or self.throughput == 0:
+            return None
+        return max(self.total - self.processed, 0) / self.throughput
+
+
+class Metrics:
+    """Collects phase timings and reports progress.
+
+    Args:
+        on_progress: Called with a `ProgressEvent` when a phase starts, at
+            most every `interval` seconds while it's running and when it
+            finishes. It's called from worker threads.
+        interval: Minimal number of seconds between progress events.
+    """
+
+    def __init__(
+        self,
+        on_progress: Optional[Callable[[ProgressEvent], None]] = None,
+        interval: float = 0.5,
+    ):
+        self.on_progress = on_progress
+        self.interval = interval
+        self.timings: Dict[str, float] = {}
+        self._event: Optional[ProgressEvent] = None
+        self._start = 0.0
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Progress is reported to a callback."""
+        return self.on_progress is not None
+
+    @contextlib.contextmanager
+    def phase(
+        self, name: str, total: Optional[int] = None
+    ) -> Iterator[ProgressEvent]:
+        """Time a phase and report its progress."""
+        event = ProgressEvent(phase=name, total=total)
+        with self._lock:
+            self._event = event
+            self._start = time.perf_counter()
+        self._emit(force=True)
+        try:
+            yield event
+        finally:
+            with self._lock:
+                event.elapsed = time.perf_counter() - self._start
+                event.finished = True
+                self.timings[name] = self.timings.get(name, 0) + event.elapsed
+            self._emit(force=True)
+            self._event = None
+
+    def update(
+        self,
+        processed: Optional[int] = None,
+        total: Optional[int] = None,
+        table: Optional[str] = None,
+    ):
+        """Set the progress of the running phase."""
+        event = self._event
+        if event is None:
+            return
+        if processed is not None:
+            event.processed = processed
+        if total is not None:
+            event.total = total
+        if table is not None:
+            event.table = table
+        self._emit()
+
+    def advance(self, data: bytes):
+        """Count bytes of the running phase."""
+        event = self._event
+        if event is None:
+            return
+        event.processed += len(data)
+        self._emit()
+
+    def scan(self, data: bytes):
+        """Find the current table in a chunk of a plain SQL dump."""
+        event = self._event
+        if event is None:
+            return
+        # Only the last table of the chunk matters, search backwards.
+        start = data.rfind(COPY)
+        if start != -1:
+            start += 1
+        elif data.startswith(COPY[1:]):
+            start = 0
+        else:
+            return
+        start += len(COPY) - 1
+        end = data.find(b" ", start)
+        event.table = data[start : None if end == -1 else end].decode(
+            "utf-8", "replace"
+        )
+        self._emit()
+
+    def feed(self, data: bytes):
+        """Count bytes and find the current table, see `advance`, `scan`."""
+        self.scan(data)
+        self.advance(data)
+
+    def _emit(self, force: bool = False):
+        if self.on_progress is None or self._event is None:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            if not force and now - self._last < self.interval:
+                return
+            self._last = now
+            event = self._event
+            if event is None:
+                return
+            if not event.finished:
+                event.elapsed = now - self._start
+        self.on_progress(event)
+
+
+def copy_stream(
+    source: IO,
+    sink: IO,
+    callback: Callable[[bytes], None],
+    errors: List[Exception],
+    close_source: bool = True,
+):
+    """Copy source to sink calling the callback for every chunk.
+
+    Used as a thread target between two processes. The sink is always
+    closed, so the downstream process sees the end of the stream, and
+    exceptions other than a broken pipe are appended to `errors`.
+    """
+    try:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            sink.write(chunk)
+            callback(chunk)
+    except BrokenPipeError:
+        # Downstream process exited, it reports its own error.
+        pass
+    except Exception as e:
+        errors.append(e)
+    finally:
+        try:
+            sink.close()
+        except BrokenPipeError:
+            pass
+        if close_source:
+            source.close()
@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import contextlib
+from pathlib import Path
+from typing import Optional, Callable
+
+from django.db import connections
+
+from tea_django.errors import DatabaseError
+from tea_django.database.base import Database
+from tea_django.database.progress import Metrics
+from tea_django.database.utils import atomic_output
+
+
+class SQLite(Database):
+    """Class for manipulating SQLite database.
+
+    Dumps and loads use the SQLite online backup API, so pages are copied
+    directly without replaying SQL.
+    """
+
+    EXTENSION = ".sqlite3"
+
+    # Number of pages copied in each backup step. Between steps the source
+    # database is unlocked, so writers are never blocked for the whole dump.
+    PAGES = 1024
+    # Pause between steps, gives writers a chance to get the lock.
+    SLEEP = 0.01
+
+    def __init__(
+        self, alias: str = "default", metrics: Optional[Metrics] = None
+    ):
+        super().__init__(alias=alias, metrics=metrics)
+        self.database = str(self.settings["NAME"])
+
+    @property
+    def dump_name(self) -> str:
+        return Path(self.database).stem
+
+    def _backup(
+        self,
+        source: str,
+        target: str,
+        pages: int,
+        sleep: float,
+        progress: Optional[Callable[[int, int], None]],
+    ):
+        with contextlib.closing(sqlite3.connect(source)) as src:
+            page_size = src.execute("PRAGMA page_size").fetchone()[0]
+
+            def on_step(status, remaining, total):
+                self.metrics.update(
+                    processed=(total - remaining) * page_size,
+                    total=total * page_size,
+                )
+                if progress is not None:
+                    progress(total - remaining, total)
+
+            with contextlib.closing(sqlite3.connect(target)) as dst:
+                src.backup(dst, pages=pages, progress=on_step, sleep=sleep)
+
+    def dump(
+        self,
+        output_directory: Path,
+        tag: Optional[str] = None,
+        delete: bool = False,
+        pages: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> str:
+        """Take a consistent hot backup of the database.
+
+        If another connection writes to the database between two steps, the
+        backup restarts, so the result is always a consistent snapshot.
+
+        Args:
+            output_directory: Directory where the dump will be written.
+            tag: Optional tag added to the end of the filename.
+            delete: Delete the backup file if it already exists.
+            pages: Number of pages copied in each step. Default: `PAGES`.
+            progress: Called with (copied pages, total pages) after each
+                step.
+
+        Returns:
+            str: Path to the dump file.
+        """
+        filename = self.dump_filename(output_directory, tag)
+        os.makedirs(output_directory, exist_ok=True)
+        if delete and os.path.isfile(filename):
+            os.remove(filename)
+
+        with self.metrics.phase("dump"), atomic_output(filename) as f:
+            # The backup API opens the file itself.
+            f.close()
+            self._backup(
+                self.database,
+                f.name,
+                pages=pages or self.PAGES,
+                sleep=self.SLEEP,
+                progress=progress,
+            )
+        return str(filename)
+
+    def load(
+        self,
+        filename,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        """Restore the database from a dump by copying its pages.
+
+        The whole restore is done in a single step, so other connections
+        never see a partially restored database.
+
+        Args:
+            filename: Dump file.
+            progress: Called with (copied pages, total pages).
+        """
+        if not os.path.isfile(filename):
+            raise DatabaseError(message=f"`{filename}` not found.")
+
+        connections[self.alias].close()
+        with self.metrics.phase("restore"):
+            self._backup(
+                str(filename),
+                self.database,
+                pages=-1,
+                sleep=self.SLEEP,
+                progress=progress,
+            )
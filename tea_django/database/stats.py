@@ -0,0 +1,317 @@
+"""PostgreSQL diagnostics: table bloat, index usage and slow queries.
+
+All numbers come from the cumulative statistics views, so they describe the
+activity since the statistics were last reset.
+"""
+
+__all__ = [
+    "TableStats",
+    "IndexStats",
+    "DuplicateIndexes",
+    "QueryStats",
+    "DatabaseStats",
+    "collect_stats",
+]
+
+from dataclasses import dataclass, field
+from typing import Optional, List
+
+from django.db import DatabaseError, connections, transaction
+from rich.markup import escape
+from tea_console.table import Column, RichTableMixin
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f}"
+
+
+# Bloat is estimated from the share of dead tuples in the table, it's 0 for
+# empty and never analyzed tables.
+TABLES_SQL = """
+SELECT
+    s.schemaname,
+    s.relname,
+    pg_total_relation_size(s.relid),
+    pg_relation_size(s.relid),
+    pg_indexes_size(s.relid),
+    s.n_live_tup,
+    s.n_dead_tup,
+    coalesce(
+        pg_relation_size(s.relid) * s.n_dead_tup
+        / nullif(s.n_live_tup + s.n_dead_tup, 0),
+        0
+    )::bigint,
+    s.seq_scan,
+    s.seq_tup_read,
+    coalesce(s.idx_scan, 0)
+FROM pg_stat_user_tables AS s
+ORDER BY 3 DESC
+"""
+
+INDEXES_SQL = """
+SELECT
+    s.schemaname,
+    s.relname,
+    s.indexrelname,
+    pg_relation_size(s.indexrelid),
+    s.idx_scan,
+    i.indisunique OR i.indisprimary
+FROM pg_stat_user_indexes AS s
+JOIN pg_index AS i ON i.indexrelid = s.indexrelid
+ORDER BY 4 DESC
+"""
+
+# Indexes are duplicates if they cover the same columns with the same
+# operator classes, expressions and predicates.
+DUPLICATE_INDEXES_SQL = """
+SELECT
+    n.nspname,
+    t.relname,
+    array_agg(c.relname ORDER BY c.relname),
+    sum(pg_relation_size(c.oid))::bigint
+FROM pg_index AS i
+JOIN pg_class AS c ON c.oid = i.indexrelid
+JOIN pg_class AS t ON t.oid = i.indrelid
+JOIN pg_namespace AS n ON n.oid = t.relnamespace
+WHERE n.nspname NOT IN ('pg_catalog', 'information_schema')
+    AND n.nspname NOT LIKE 'pg_toast%'
+GROUP BY
+    n.nspname,
+    t.relname,
+    i.indrelid,
+    i.indkey::text,
+    i.indclass::text,
+    coalesce(i.indexprs::text, ''),
+    coalesce(i.indpred::text, '')
+HAVING count(*) > 1
+ORDER BY 4 DESC
+"""
+
+STATEMENTS_EXTENSION_SQL = (
+    "SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'"
+)
+
+# Timing columns were renamed in PostgreSQL 13.
+STATEMENTS_SQL = """
+SELECT query, calls, {total} AS total_time, {mean} AS mean_time, rows
+FROM pg_stat_statements
+WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+ORDER BY 3 DESC
+LIMIT %s
+"""
+
+
+@dataclass
+class TableStats(RichTableMixin):
+    """Table size, bloat estimate and scan counters."""
+
+    schema: str
+    table: str
+    total_size: int
+    table_size: int
+    indexes_size: int
+    live_tuples: int
+    dead_tuples: int
+    bloat: int
+    seq_scans: int
+    seq_tuples_read: int
+    index_scans: int
+
+    HEADERS = [
+        Column(title="Table", path=lambda t: f"{t.schema}.{t.table}"),
+        Column(
+            title="Total (MB)",
+            path=lambda t: _mb(t.total_size),
+            align=Column.Align.right,
+        ),
+        Column(
+            title="Table (MB)",
+            path=lambda t: _mb(t.table_size),
+            align=Column.Align.right,
+        ),
+        Column(
+            title="Indexes (MB)",
+            path=lambda t: _mb(t.indexes_size),
+            align=Column.Align.right,
+        ),
+        Column(title="Live", path="live_tuples", align=Column.Align.right),
+        Column(title="Dead", path="dead_tuples", align=Column.Align.right),
+        Column(
+            title="Bloat (MB)",
+            path=lambda t: _mb(t.bloat),
+            align=Column.Align.right,
+        ),
+        Column(title="Seq scans", path="seq_scans", align=Column.Align.right),
+        Column(
+            title="Seq rows read",
+            path="seq_tuples_read",
+            align=Column.Align.right,
+        ),
+        Column(
+            title="Index scans", path="index_scans", align=Column.Align.right
+        ),
+    ]
+
+
+@dataclass
+class IndexStats(RichTableMixin):
+    """Index size and usage."""
+
+    schema: str
+    table: str
+    index: str
+    size: int
+    scans: int
+    unique: bool
+
+    HEADERS = [
+        Column(title="Table", path=lambda i: f"{i.schema}.{i.table}"),
+        Column(title="Index", path="index"),
+        Column(
+            title="Size (MB)",
+            path=lambda i: _mb(i.size),
+            align=Column.Align.right,
+        ),
+        Column(title="Scans", path="scans", align=Column.Align.right),
+        Column(title="Unique", path="unique", align=Column.Align.center),
+    ]
+
+
+@dataclass
+class DuplicateIndexes(RichTableMixin):
+    """Indexes of a table that are identical."""
+
+    schema: str
+    table: str
+    indexes: List[str]
+    size: int
+
+    HEADERS = [
+        Column(title="Table", path=lambda d: f"{d.schema}.{d.table}"),
+        Column(title="Indexes", path=lambda d: ", ".join(d.indexes)),
+        Column(
+            title="Size (MB)",
+            path=lambda d: _mb(d.size),
+            align=Column.Align.right,
+        ),
+    ]
+
+
+@dataclass
+class QueryStats(RichTableMixin):
+    """Query statistics from `pg_stat_statements`."""
+
+    query: str
+    calls: int
+    total_time: float
+    mean_time: float
+    rows: int
+
+    HEADERS = [
+        # Queries can contain `[...]`, which Rich would parse as markup.
+        Column(title="Query", path=lambda q: escape(q.query)),
+        Column(title="Calls", path="calls", align=Column.Align.right),
+        Column(
+            title="Total (ms)",
+            path=lambda q: f"{q.total_time:.1f}",
+            align=Column.Align.right,
+        ),
+        Column(
+            title="Mean (ms)",
+            path=lambda q: f"{q.mean_time:.2f}",
+            align=Column.Align.right,
+        ),
+        Column(title="Rows", path="rows", align=Column.Align.right),
+    ]
+
+
+@dataclass
+class DatabaseStats:
+    """All collected diagnostics.
+
+    Attributes:
+        tables: Largest tables.
+        indexes: Largest indexes.
+        unused_indexes: Non unique indexes that were never scanned.
+        duplicate_indexes: Groups of identical indexes.
+        seq_scan_tables: Tables read mostly with sequential scans, sorted by
+            the number of rows read sequentially.
+        queries: Queries with the highest total execution time.
+        statements_available: `False` if `pg_stat_statements` is not
+            installed or not loaded, `queries` is empty in that case.
+    """
+
+    database: str
+    tables: List[TableStats] = field(default_factory=list)
+    indexes: List[IndexStats] = field(default_factory=list)
+    unused_indexes: List[IndexStats] = field(default_factory=list)
+    duplicate_indexes: List[DuplicateIndexes] = field(default_factory=list)
+    seq_scan_tables: List[TableStats] = field(default_factory=list)
+    queries: List[QueryStats] = field(default_factory=list)
+    statements_available: bool = False
+
+
+def _queries(connection, cursor, limit: int) -> Optional[List[QueryStats]]:
+    cursor.execute(STATEMENTS_EXTENSION_SQL)
+    if cursor.fetchone() is None:
+        return None
+    if connection.pg_version >= 130000:
+        sql = STATEMENTS_SQL.format(
+            total="total_exec_time", mean="mean_exec_time"
+        )
+    else:
+        sql = STATEMENTS_SQL.format(total="total_time", mean="mean_time")
+    try:
+        # Fails if the extension is not in `shared_preload_libraries`.
+        with transaction.atomic(using=connection.alias):
+            cursor.execute(sql, [limit])
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return None
+    return [QueryStats(*row) for row in rows]
+
+
+def collect_stats(
+    postgres, limit: int = 10, min_seq_rows: int = 1000
+) -> DatabaseStats:
+    """Collect table, index and query diagnostics.
+
+    Args:
+        postgres: PostgreSQL instance of the inspected database.
+        limit: Maximal number of entries in every section.
+        min_seq_rows: Tables with fewer live rows are never reported as
+            sequential scan heavy, scanning them is cheaper than an index.
+
+    Returns:
+        Collected diagnostics.
+    """
+    connection = connections[postgres.alias]
+    stats = DatabaseStats(database=postgres.database)
+    with connection.cursor() as cursor:
+        cursor.execute(TABLES_SQL)
+        tables = [TableStats(*row) for row in cursor.fetchall()]
+        cursor.execute(INDEXES_SQL)
+        indexes = [IndexStats(*row) for row in cursor.fetchall()]
+        cursor.execute(DUPLICATE_INDEXES_SQL)
+        duplicates = [DuplicateIndexes(*row) for row in cursor.fetchall()]
+        queries = _queries(connection, cursor, limit)
+
+    stats.tables = tables[:limit]
+    stats.indexes = indexes[:limit]
+    stats.unused_indexes = [
+        index for index in indexes if index.scans == 0 and not index.unique
+    ][:limit]
+    stats.duplicate_indexes = duplicates[:limit]
+    stats.seq_scan_tables = sorted(
+        (
+            table
+            for table in tables
+            if table.live_tuples >= min_seq_rows
+            and table.seq_scans > table.index_scans
+        ),
+        key=lambda table: table.seq_tuples_read,
+        reverse=True,
+    )[:limit]
+    stats.statements_available = queries is not None
+    stats.queries = queries or []
+    return stats
@@ -0,0 +1,408 @@
+"""Content-addressed, deduplicating store for plain SQL dumps.
+
+Dumps are split into content-defined chunks and every unique chunk is stored
+only once, compressed, under its SHA-256 hash::
+
+    {root}/
+        chunks/{hash[:2]}/{hash}
+        snapshots/{name}.json
+        writing/{name}.chunks
+
+A snapshot manifest lists the hashes of its chunks in order. While a
+snapshot is being written, its chunks are appended to a journal in
+`writing/`, which the writer keeps locked, so `gc` never deletes them. Chunk
+boundaries are placed after lines whose checksum matches a bit mask, so an
+insert or delete in one table only changes the chunks around it and the
+rest of the dump deduplicates against previous snapshots. This works best
+with uncompressed plain format dumps, compressed input never deduplicates.
+"""
+
+__all__ = ["Snapshot", "SnapshotWriter", "DumpStore"]
+
+import os
+import json
+import fcntl
+import zlib
+import time
+import hashlib
+import threading
+import contextlib
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass, field, asdict
+from typing import Optional, List, Set, Tuple, Iterator, IO
+
+from tea_django.errors import DatabaseError
+from tea_django.database.utils import atomic_output
+
+
+@dataclass
+class Snapshot:
+    """Snapshot manifest.
+
+    Attributes:
+        name: Unique snapshot name.
+        database: Name of the dumped database.
+        created: Creation time.
+        size: Uncompressed size of the dump in bytes.
+        chunks: Chunk hashes in order.
+    """
+
+    name: str
+    database: str
+    created: datetime
+    size: int = 0
+    chunks: List[str] = field(default_factory=list)
+
+
+class SnapshotWriter:
+    """File like object that chunks a dump into the store.
+
+    The manifest is written only when the writer is closed without an error,
+    chunks of an incomplete snapshot are removed by `DumpStore.gc`. Until
+    then the chunks are listed in a locked journal, see `DumpStore.gc`.
+    """
+
+    def __init__(self, store: "DumpStore", snapshot: Snapshot):
+        self.store = store
+        self.snapshot = snapshot
+        self._buffer = bytearray()
+        # Position in the buffer from which to look for line ends.
+        self._scan = 0
+        # The journal is locked before it appears under its name, so `gc`
+        # never takes it for the journal of a crashed writer.
+        self._journal_path = store._journal_path(snapshot.name)
+        partial = f"{self._journal_path}.part"
+        self._journal = open(partial, "wb")
+        fcntl.flock(self._journal, fcntl.LOCK_EX)
+        os.replace(partial, self._journal_path)
+
+    def write(self, data: bytes) -> int:
+        store = self.store
+        self._buffer.extend(data)
+        start = 0
+        while True:
+            end = self._buffer.find(b"\n", self._scan)
+            if end == -1:
+                break
+            line_start, self._scan = self._scan, end + 1
+            size = self._scan - start
+            if size >= store.max_chunk_size or (
+                size >= store.min_chunk_size
+                and zlib.crc32(self._buffer[line_start : self._scan])
+                & store.boundary_mask
+                == 0
+            ):
+                self._add_chunk(self._buffer[start : self._scan])
+                start = self._scan
+        while len(self._buffer) - start >= store.max_chunk_size:
+            # No line end in a big block of data.
+            self._add_chunk(self._buffer[start : start + store.max_chunk_size])
+            start += store.max_chunk_size
+        del self._buffer[:start]
+        self._scan = max(self._scan - start, 0)
+        return len(data)
+
+    def _add_chunk(self, data: bytes):
+        digest = self.store.put_chunk(bytes(data))
+        self._journal.write(f"{digest}\n".encode("ascii"))
+        self._journal.flush()
+        self.snapshot.chunks.append(digest)
+        self.snapshot.size += len(data)
+
+    def _close_journal(self):
+        if not self._journal.closed:
+            os.remove(self._journal_path)
+            self._journal.close()
+
+    def close(self):
+        """Store the remaining data and write the manifest."""
+        try:
+            if self._buffer:
+                self._add_chunk(self._buffer)
+                self._buffer = bytearray()
+            self.store.write_manifest(self.snapshot)
+        finally:
+            self._close_journal()
+
+    def abort(self):
+        """Discard the snapshot, its chunks are left to `DumpStore.gc`."""
+        self._close_journal()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class DumpStore:
+    """Deduplicating dump store.
+
+    Args:
+        root: Store directory, created if it doesn't exist.
+        level: zlib compression level of the stored chunks.
+    """
+
+    CHUNKS = "chunks"
+    SNAPSHOTS = "snapshots"
+    WRITING = "writing"
+
+    # Chunk size limits in bytes, boundaries are searched only in between.
+    min_chunk_size = 64 * 1024
+    max_chunk_size = 4 * 1024 * 1024
+    # One in 8192 lines ends a chunk.
+    boundary_mask = 0x1FFF
+    # Chunks modified more recently are never garbage collected. Covers a
+    # chunk stored or reused by a writer just before it's journaled.
+    gc_grace_period = 3600
+
+    def __init__(self, root: Path, level: int = 6):
+        self.root = Path(root)
+        self.level = level
+        os.makedirs(self.root / self.CHUNKS, exist_ok=True)
+        os.makedirs(self.root / self.SNAPSHOTS, exist_ok=True)
+        os.makedirs(self.root / self.WRITING, exist_ok=True)
+
+    # Chunks
+
+    def chunk_path(self, digest: str) -> Path:
+        return self.root / self.CHUNKS / digest[:2] / digest
+
+    def put_chunk(self, data: bytes) -> str:
+        """Store a chunk if it's not stored yet and return its hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.chunk_path(digest)
+        if path.is_file():
+            # Protect the chunk from a concurrent garbage collection.
+            try:
+                os.utime(path)
+                return digest
+            except FileNotFoundError:
+                # Collected in the meantime, store it again.
+                pass
+        os.makedirs(path.parent, exist_ok=True)
+        with atomic_output(path) as f:
+            f.write(zlib.compress(data, self.level))
+        return digest
+
+    def get_chunk(self, digest: str) -> bytes:
+        path = self.chunk_path(digest)
+        if not path.is_file():
+            raise DatabaseError(message=f"Chunk `{digest}` not found.")
+        with open(path, "rb") as f:
+            return zlib.decompress(f.read())
+
+    # Snapshots
+
+    def _manifest_path(self, name: str) -> Path:
+        return self.root / self.SNAPSHOTS / f"{name}.json"
+
+    def _journal_path(self, name: str) -> Path:
+        return self.root / self.WRITING / f"{name}.chunks"
+
+    def _writing(self) -> Set[str]:
+        """Return chunks of the snapshots that are being written.
+
+        Journals that are not locked were left behind by a crashed writer,
+        they are removed.
+        """
+        chunks = set()
+        for path in (self.root / self.WRITING).glob("*.chunks"):
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                # The writer finished in the meantime.
+                continue
+            with f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Ignore a line that is being written.
+                    chunks.update(
+                        line.decode("ascii")
+                        for line in f.read().splitlines()
+                        if len(line) == 64
+                    )
+                else:
+                    with contextlib.suppress(FileNotFoundError):
+                        path.unlink()
+        return chunks
+
+    def write_manifest(self, snapshot: Snapshot):
+        data = asdict(snapshot)
+        data["created"] = snapshot.created.isoformat()
+        with atomic_output(self._manifest_path(snapshot.name)) as f:
+            f.write(json.dumps(data, indent=2).encode("utf-8"))
+
+    def get(self, name: str) -> Snapshot:
+        """Read a snapshot manifest."""
+        path = self._manifest_path(name)
+        if not path.is_file():
+            raise DatabaseError(message=f"Snapshot `{name}` not found.")
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data["created"] = datetime.fromisoformat(data["created"])
+        return Snapshot(**data)
+
+    def snapshots(self, database: Optional[str] = None) -> List[Snapshot]:
+        """List snapshots, oldest first."""
+        snapshots = [
+            self.get(path.stem)
+            for path in (self.root / self.SNAPSHOTS).glob("*.json")
+        ]
+        return sorted(
+            (
+                snapshot
+                for snapshot in snapshots
+                if database is None or snapshot.database == database
+            ),
+            key=lambda snapshot: snapshot.created,
+        )
+
+    def writer(
+        self, name: str, database: str, created: Optional[datetime] = None
+    ) -> SnapshotWriter:
+        """Create a writer for a new snapshot."""
+        if self._manifest_path(name).is_file() or (
+            self._journal_path(name).is_file()
+        ):
+            raise DatabaseError(message=f"Snapshot `{name}` already exists.")
+        return SnapshotWriter(
+            self,
+            Snapshot(
+                name=name, database=database, created=created or datetime.now()
+            ),
+        )
+
+    def read(self, name: str) -> Iterator[bytes]:
+        """Reassemble a snapshot chunk by chunk."""
+        snapshot = self.get(name)
+        return (self.get_chunk(digest) for digest in snapshot.chunks)
+
+    @contextlib.contextmanager
+    def open(self, name: str) -> Iterator[IO]:
+        """Open a snapshot as a readable pipe.
+
+        The pipe can be used as the stdin of a subprocess, chunks are fed
+        into it from a background thread.
+        """
+        chunks = self.read(name)
+        read_fd, write_fd = os.pipe()
+        error = []
+
+        def feed():
+            try:
+                with open(write_fd, "wb") as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+            except BrokenPipeError:
+                # The reader exited early, it reports its own error.
+                pass
+            except Exception as e:
+                error.append(e)
+
+        thread = threading.Thread(target=feed, daemon=True)
+        thread.start()
+        with open(read_fd, "rb") as f:
+            try:
+                yield f
+            finally:
+                f.close()
+                thread.join()
+        if error:
+            raise error[0]
+
+    # Retention
+
+    def retain(
+        self,
+        daily: int = 7,
+        weekly: int = 4,
+        monthly: int = 12,
+        dry_run: bool = False,
+    ) -> List[Snapshot]:
+        """Delete snapshots that are not covered by the retention rules.
+
+        For every database the newest snapshot of each of the last `daily`
+        days, `weekly` weeks and `monthly` months is kept. The newest
+        snapshot is always kept. Chunks are not deleted, run `gc` for that.
+
+        Returns:
+            List of deleted (or with `dry_run` to be deleted) snapshots.
+        """
+        by_database = {}
+        for snapshot in self.snapshots():
+            by_database.setdefault(snapshot.database, []).append(snapshot)
+
+        rules = [
+            (lambda created: created.date(), daily),
+            (lambda created: created.isocalendar()[:2], weekly),
+            (lambda created: (created.year, created.month), monthly),
+        ]
+        deleted = []
+        for snapshots in by_database.values():
+            snapshots = snapshots[::-1]
+            keep = {snapshots[0].name}
+            for period, count in rules:
+                periods = set()
+                for snapshot in snapshots:
+                    key = period(snapshot.created)
+                    if key in periods:
+                        continue
+                    if len(periods) >= count:
+                        break
+                    periods.add(key)
+                    keep.add(snapshot.name)
+            deleted.extend(s for s in snapshots if s.name not in keep)
+
+        if not dry_run:
+            for snapshot in deleted:
+                self._manifest_path(snapshot.name).unlink()
+        return deleted
+
+    def gc(
+        self,
+        dry_run: bool = False,
+        retained: Optional[List[Snapshot]] = None,
+    ) -> Tuple[int, int]:
+        """Delete chunks that are not referenced by any snapshot.
+
+        Chunks of snapshots that are being written are referenced by their
+        journals, no matter how long the dump takes.
+
+        Args:
+            dry_run: Only count the chunks.
+            retained: Snapshots whose chunks are kept, e.g. the ones a dry
+                run of `retain` would keep. Default: all snapshots.
+
+        Returns:
+            Tuple of the number of deleted chunks and freed bytes.
+        """
+        # Journals first: a finished writer writes its manifest before it
+        # removes its journal.
+        referenced = self._writing()
+        if retained is None:
+            retained = self.snapshots()
+        for snapshot in retained:
+            referenced.update(snapshot.chunks)
+
+        deadline = time.time() - self.gc_grace_period
+        count = size = 0
+        for path in (self.root / self.CHUNKS).glob("*/*"):
+            if path.name in referenced:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime > deadline:
+                continue
+            count += 1
+            size += stat.st_size
+            if not dry_run:
+                path.unlink()
+        return count, size
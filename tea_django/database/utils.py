@@ -0,0 +1,20 @@
+import os
+import contextlib
+from typing import IO, Iterator
+
+
+@contextlib.contextmanager
+def atomic_output(filename) -> Iterator[IO]:
+    """Open a temporary `.part` file that replaces `filename` on success.
+
+    If the block raises, the partial file is removed, so a failed write
+    never leaves a truncated file behind.
+    """
+    partial = f"{filename}.part"
+    try:
+        with open(partial, "wb") as f:
+            yield f
+        os.replace(partial, filename)
+    finally:
+        if os.path.isfile(partial):
+            os.remove(partial)
@@ -1,4 +1,13 @@
-__all__ = ["VanillaModel", "UUIDBaseModel"]
+__all__ = [
+    "VanillaModel",
+    "UUIDBaseModel",
+    "UUID7BaseModel",
+    "UUIDBaseQuerySet",
+]
 
 from tea_django.models.vanilla import VanillaModel
-from tea_django.models.uuid_base import UUIDBaseModel
+from tea_django.models.uuid_base import (
+    UUIDBaseModel,
+    UUID7BaseModel,
+    UUIDBaseQuerySet,
+)
@@ -0,0 +1,168 @@
+"""Caches for model lookups.
+
+Cached objects are stored as their loaded field values and a fresh instance
+is built on every hit, so callers never share an instance.
+"""
+
+__all__ = ["LRUCache", "DjangoCache", "CacheStats", "SlugCache"]
+
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from django.core.cache import caches
+
+
+class LRUCache:
+    """In-process least recently used cache with a TTL.
+
+    Args:
+        max_size: Maximal number of entries.
+        timeout: Entry time to live in seconds.
+    """
+
+    def __init__(self, max_size: int = 10000, timeout: float = 300):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DjangoCache:
+    """Adapter for a Django cache backend.
+
+    Size bound and eviction are handled by the backend itself.
+
+    Args:
+        alias: Django cache alias.
+        timeout: Entry time to live in seconds.
+    """
+
+    def __init__(self, alias: str = "default", timeout: float = 300):
+        self.alias = alias
+        self.timeout = timeout
+
+    def get(self, key: str) -> Optional[Any]:
+        return caches[self.alias].get(key)
+
+    def set(self, key: str, value: Any):
+        caches[self.alias].set(key, value, timeout=self.timeout)
+
+    def delete(self, key: str):
+        caches[self.alias].delete(key)
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counters of a cache in this process."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+
+class SlugCache:
+    """Cache of slug lookups, see `SlugMixinBase.SLUG_CACHE`.
+
+    Entries are invalidated on `post_save` and `post_delete`, for both the
+    old and the new slug, and again when the transaction commits. Queryset
+    `update` and `delete` don't send those signals, entries changed that
+    way are stale until they expire.
+
+    Args:
+        cache: Django cache alias. Default: in-process LRU cache.
+        timeout: Entry time to live in seconds.
+        max_size: Maximal number of entries of the in-process cache.
+        prefix: Key prefix.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[str] = None,
+        timeout: float = 300,
+        max_size: int = 10000,
+        prefix: str = "tea_django:slug",
+    ):
+        if cache is None:
+            self.backend = LRUCache(max_size=max_size, timeout=timeout)
+        else:
+            self.backend = DjangoCache(alias=cache, timeout=timeout)
+        self.prefix = prefix
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @property
+    def local(self) -> bool:
+        """Entries are kept in this process, lookups don't block."""
+        return isinstance(self.backend, LRUCache)
+
+    def key(self, model, slug: str) -> str:
+        return f"{self.prefix}:{model._meta.label_lower}:{slug}"
+
+    def get(self, model, slug: str):
+        """Return a cached instance or `None`."""
+        item = self.backend.get(self.key(model, slug))
+        with self._lock:
+            if item is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        if item is None:
+            return None
+        db, field_names, values = item
+        return model.from_db(db, field_names, values)
+
+    def set(self, instance):
+        """Cache an instance under its slug."""
+        field_names = [
+            field.attname
+            for field in instance._meta.concrete_fields
+            if field.attname in instance.__dict__
+        ]
+        values = [instance.__dict__[name] for name in field_names]
+        self.backend.set(
+            self.key(instance.__class__, instance.slug),
+            (instance._state.db, field_names, values),
+        )
+
+    def invalidate(self, model, *slugs: str):
+        """Remove slugs from the cache."""
+        for slug in slugs:
+            self.backend.delete(self.key(model, slug))
@@ -1,12 +1,23 @@
 __all__ = [
     "ColoredMixin",
+    "DirtyFieldsMixin",
     "UniqueSlugMixin",
     "NonUniqueSlugMixin",
     "TimerMixin",
+    "TimerQuerySet",
     "TimestampedMixin",
+    "TimestampedQuerySet",
+    "IndexKind",
+    "timestamp_indexes",
 ]
 
 from tea_django.models.mixins.colored import ColoredMixin
+from tea_django.models.mixins.dirty import DirtyFieldsMixin
 from tea_django.models.mixins.slug import UniqueSlugMixin, NonUniqueSlugMixin
-from tea_django.models.mixins.timer import TimerMixin
-from tea_django.models.mixins.timestamped import TimestampedMixin
+from tea_django.models.mixins.timer import TimerMixin, TimerQuerySet
+from tea_django.models.mixins.timestamped import (
+    TimestampedMixin,
+    TimestampedQuerySet,
+    IndexKind,
+    timestamp_indexes,
+)
@@ -0,0 +1,99 @@
+from typing import Any, Dict, Optional
+
+from django.db import models
+
+# Marks a value that was not loaded from the database.
+_MISSING = object()
+
+
+class DirtyFieldsMixin(models.Model):
+    """Mixin that tracks which fields changed since the last load or save.
+
+    Loaded values are kept by reference, nothing is copied. Changes are
+    detected by comparing the current values with them, so in-place
+    mutations of mutable values (e.g. a dict in a JSON field) are not
+    detected. Deferred fields are never reported as changed until they are
+    loaded.
+    """
+
+    def _concrete_attnames(self):
+        return [field.attname for field in self._meta.concrete_fields]
+
+    def _snapshot(self, attnames=None):
+        loaded = self.__dict__
+        values = {
+            attname: loaded[attname]
+            for attname in (attnames or self._concrete_attnames())
+            if attname in loaded
+        }
+        if attnames is None:
+            self._loaded_values = values
+        else:
+            self._loaded_values = {
+                **getattr(self, "_loaded_values", {}),
+                **values,
+            }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def _is_dirty(self, attname: str) -> bool:
+        if attname not in self.__dict__:
+            return False
+        loaded_values = getattr(self, "_loaded_values", None)
+        if loaded_values is None:
+            return True
+        old = loaded_values.get(attname, _MISSING)
+        return old is _MISSING or old != self.__dict__[attname]
+
+    def get_dirty_fields(self) -> Dict[str, Any]:
+        """Return changed fields mapped to their loaded values.
+
+        All loaded fields of a new instance are dirty, their loaded value is
+        `None`.
+        """
+        loaded_values = getattr(self, "_loaded_values", None) or {}
+        return {
+            attname: loaded_values.get(attname)
+            for attname in self._concrete_attnames()
+            if self._is_dirty(attname)
+        }
+
+    def is_dirty(self, field: Optional[str] = None) -> bool:
+        """Check if a field, or any field if not provided, changed."""
+        if field is None:
+            return any(map(self._is_dirty, self._concrete_attnames()))
+        return self._is_dirty(self._meta.get_field(field).attname)
+
+    def save_dirty(self, **kwargs):
+        """Save only changed fields, nothing is saved if none changed."""
+        if self._state.adding:
+            self.save(**kwargs)
+            return
+        dirty = self.get_dirty_fields()
+        if dirty:
+            self.save(update_fields=list(dirty), **kwargs)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        self._snapshot(
+            None
+            if update_fields is None
+            else [self._meta.get_field(name).attname for name in update_fields]
+        )
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._snapshot(
+            None
+            if fields is None
+            else [self._meta.get_field(name).attname for name in fields]
+        )
+
+    class Meta:
+        app_label = "tea_django"
+        abstract = True
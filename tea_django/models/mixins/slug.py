@@ -1,18 +1,113 @@
-import random
-import string
+import re
+import contextlib
+from collections import Counter
+from typing import Iterable, List, Optional, Set
 
 from slugify import slugify
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.dispatch import receiver
+from django.db import models, router, transaction, IntegrityError
+from django.db.models.signals import post_save, post_delete
 from django.utils.crypto import get_random_string
+from django.core.exceptions import FieldDoesNotExist
+
+from tea_django.models.cache import SlugCache
+from tea_django.models.mixins.dirty import DirtyFieldsMixin
 
 
 def generate_random_slug():
     return get_random_string(8, "0123456789")  # 8 characters, only digits.
 
 
+def base_slug(value, max_length=45):
+    """Slugify value and cut it on a word boundary to at most max_length."""
+    slug_words = slugify(value).split("-")
+    slug = slug_words[0]
+    for word in slug_words[1:]:
+        new_slug = f"{slug}-{word}"
+        if len(new_slug) <= max_length:
+            slug = new_slug
+        else:
+            break
+    return slug
+
+
+def taken_slugs(slug, queryset):
+    """Fetch `slug` and all `slug-N` values from the queryset in one query.
+
+    The `startswith` filter can use the slug index, the regex only removes
+    longer slugs with the same prefix (`slug-word`). Slugs only contain
+    `[a-z0-9-]`, so they are safe to use in the pattern.
+    """
+    return set(
+        queryset.filter(
+            models.Q(slug=slug)
+            | models.Q(
+                slug__startswith=f"{slug}-", slug__regex=rf"^{slug}-[0-9]+$"
+            )
+        ).values_list("slug", flat=True)
+    )
+
+
+def taken_slugs_bulk(
+    slugs: Iterable[str], queryset, batch_size: int = 500
+) -> Set[str]:
+    """Fetch taken values for many slugs, see `taken_slugs`.
+
+    Exact matches are fetched first. `slug-N` values are fetched only for
+    slugs that are taken, or that appear more than once in `slugs`, with
+    one regex query per batch.
+
+    Returns:
+        Set of all taken `slug` and `slug-N` values.
+    """
+    slugs = list(slugs)
+    unique = list(dict.fromkeys(slugs))
+    taken = set()
+    for i in range(0, len(unique), batch_size):
+        taken.update(
+            queryset.filter(slug__in=unique[i : i + batch_size]).values_list(
+                "slug", flat=True
+            )
+        )
+
+    seen = set()
+    duplicated = set()
+    for slug in slugs:
+        if slug in seen:
+            duplicated.add(slug)
+        seen.add(slug)
+    suffixed = [slug for slug in unique if slug in taken or slug in duplicated]
+    for i in range(0, len(suffixed), batch_size):
+        pattern = rf"^({'|'.join(suffixed[i : i + batch_size])})-[0-9]+$"
+        taken.update(
+            queryset.filter(slug__regex=pattern).values_list("slug", flat=True)
+        )
+    return taken
+
+
+def next_free_slug(slug, taken: Iterable[str]):
+    """Return slug or `slug-N` with the smallest N that is not taken."""
+    if slug not in taken:
+        return slug
+    suffix_re = re.compile(rf"^{re.escape(slug)}-([0-9]+)$")
+    suffixes = set()
+    for value in taken:
+        match = suffix_re.match(value)
+        if match is not None:
+            suffixes.add(int(match.group(1)))
+    i = 1
+    while i in suffixes:
+        i += 1
+    return f"{slug}-{i}"
+
+
 def create_unique_slug(value, model, object_pk, max_length=45):
     """Create a unique slug from value.
 
+    All taken candidates are fetched with a single query and the first free
+    suffix is picked in memory.
+
     Args:
         value (str): Value to slugify.
         model: Model to check against for uniqueness.
@@ -27,41 +122,63 @@ def create_unique_slug(value, model, object_pk, max_length=45):
     # slug=None, while this values is not yet saved to the database, it will
     # come up as a collision with the saved database value of the same object.
     queryset = model.objects.exclude(pk=object_pk)
+    slug = base_slug(value, max_length=max_length)
+    return next_free_slug(slug, taken_slugs(slug, queryset))
 
-    # First create a slug
-    slug_words = slugify(value).split("-")
-    slug = slug_words[0]
-    for word in slug_words[1:]:
-        new_slug = f"{slug}-{word}"
-        if len(new_slug) <= max_length:
-            slug = new_slug
-        else:
-            break
 
-    # Now check for uniqueness
-    slug_count = queryset.filter(slug=slug).count()
-    if slug_count == 0:
-        return slug
-    else:
-        for i in range(slug_count, 10000):
-            new_slug = f"{slug}-{i}"
-            if queryset.filter(slug=new_slug).count() == 0:
-                return new_slug
+async def acreate_unique_slug(value, model, object_pk, max_length=45):
+    """Async version of `create_unique_slug`."""
+    return await sync_to_async(create_unique_slug)(
+        value=value, model=model, object_pk=object_pk, max_length=max_length
+    )
+
 
-        # This should never happen but let's be prepared
-        word = "".join(random.choice(string.ascii_lowercase) for _ in range(4))
-        return f"{slug}-{word}"
+class SlugMixinBase(DirtyFieldsMixin):
+    """Base class for unique and non unique slugs.
 
+    The slug is recomputed on save only when the `SLUG_FIELD` changed.
 
-class SlugMixinBase(models.Model):
-    """Base class for unique and non unique slugs."""
+    Set `SLUG_CACHE` to a `SlugCache` to cache `get_by_slug` lookups::
+
+        class Article(UniqueSlugMixin, UUIDBaseModel):
+            SLUG_CACHE = SlugCache(timeout=60)
+    """
 
     SLUG_FIELD = "name"
+    SLUG_CACHE: Optional[SlugCache] = None
 
     def _slug_value(self):
         """Return a string value from which the slug will be created."""
         return getattr(self, self.SLUG_FIELD, str(self))
 
+    def _slug_needs_update(self, kwargs) -> bool:
+        """Check if the slug has to be recomputed before saving.
+
+        If it does and the save is limited with `update_fields`, the slug is
+        added to them.
+        """
+        update_fields = kwargs.get("update_fields")
+        try:
+            field = self._meta.get_field(self.SLUG_FIELD)
+        except FieldDoesNotExist:
+            # Slug is created from something we can't track.
+            field = None
+
+        # Don't load a deferred slug, it's already set in the database.
+        slug = self.__dict__.get("slug", True)
+        if self._state.adding or not slug or field is None:
+            changed = True
+        elif update_fields is not None and not (
+            {field.name, field.attname} & set(update_fields)
+        ):
+            changed = False
+        else:
+            changed = self._is_dirty(field.attname)
+
+        if changed and update_fields is not None:
+            kwargs["update_fields"] = list({*update_fields, "slug"})
+        return changed
+
     @classmethod
     def get_by_slug(cls, slug: str, **kwargs):
         """Get an object by it's slug.
@@ -74,13 +191,50 @@ class SlugMixinBase(models.Model):
 
         Raises:
             ObjectNotFound: If the object is not found.
+
+        Lookups without extra filters are cached if `SLUG_CACHE` is set.
+        """
+        cache = cls.SLUG_CACHE
+        if cache is None or kwargs:
+            return cls.objects.get(slug=slug, **kwargs)
+        instance = cache.get(cls, slug)
+        if instance is None:
+            instance = cls.objects.get(slug=slug)
+            cache.set(instance)
+        return instance
+
+    @classmethod
+    async def aget_by_slug(cls, slug: str, **kwargs):
+        """Async version of `get_by_slug`.
+
+        Hits of an in-process `SLUG_CACHE` are served without leaving the
+        event loop, everything else runs in a single `sync_to_async` call.
         """
-        return cls.objects.get(slug=slug, **kwargs)
+        cache = cls.SLUG_CACHE
+        if cache is None or not cache.local or kwargs:
+            return await sync_to_async(cls.get_by_slug)(slug, **kwargs)
+        instance = cache.get(cls, slug)
+        if instance is None:
+            instance = await sync_to_async(cls.objects.get)(slug=slug)
+            cache.set(instance)
+        return instance
 
     @classmethod
     def get_by_slug_field(cls, value: str, **kwargs):
         return cls.get_by_slug(slug=slugify(value), **kwargs)
 
+    @classmethod
+    async def aget_by_slug_field(cls, value: str, **kwargs):
+        return await cls.aget_by_slug(slug=slugify(value), **kwargs)
+
+    async def asave(self, *args, **kwargs):
+        """Async version of `save`.
+
+        Slug generation, collision retries and the write run together in
+        a single `sync_to_async` call.
+        """
+        await sync_to_async(self.save)(*args, **kwargs)
+
     class Meta:
         app_label = "tea_django"
         abstract = True
@@ -95,14 +249,94 @@ class UniqueSlugMixin(SlugMixinBase):
 
     slug = models.SlugField(unique=True)
 
+    @classmethod
+    def assign_slugs(
+        cls, objs: List["UniqueSlugMixin"], max_length: int = 45
+    ) -> List["UniqueSlugMixin"]:
+        """Set unique slugs on a batch of unsaved instances.
+
+        Existing slugs are fetched with a few batched queries and collisions
+        inside the batch are resolved in memory, so the instances can be
+        inserted with `bulk_create`. Concurrent writers are not taken into
+        account, the insert fails on the unique constraint in that case.
+
+        Args:
+            objs: Unsaved instances.
+            max_length: Maximal length of the slug before the suffix.
+
+        Returns:
+            The same instances.
+        """
+        bases = [base_slug(obj._slug_value(), max_length) for obj in objs]
+        queryset = cls.objects.all()
+        taken = taken_slugs_bulk(bases, queryset)
+        # `base-N` values were fetched for bases that are taken or repeated.
+        # A base can also be taken by the suffixed slug of another base in
+        # the batch (`foo-1` of `foo`), its values are fetched when needed.
+        counts = Counter(bases)
+        fetched = {base for base in bases if base in taken or counts[base] > 1}
+        # Next suffix to try for every base slug.
+        suffixes = {}
+        for obj, base in zip(objs, bases):
+            slug = base
+            if slug in taken:
+                if base not in fetched:
+                    taken.update(taken_slugs(base, queryset))
+                    fetched.add(base)
+                i = suffixes.get(base, 1)
+                while f"{base}-{i}" in taken:
+                    i += 1
+                suffixes[base] = i + 1
+                slug = f"{base}-{i}"
+            taken.add(slug)
+            obj.slug = slug
+        return objs
+
+    @classmethod
+    def bulk_create_with_slugs(cls, objs, **kwargs):
+        """Assign unique slugs and insert the instances with bulk_create."""
+        return cls.objects.bulk_create(cls.assign_slugs(objs), **kwargs)
+
+    # Number of saves attempted when a concurrent writer takes the slug
+    # between the uniqueness check and the insert.
+    SLUG_SAVE_ATTEMPTS = 5
+
+    def _slug_collides(self) -> bool:
+        return (
+            self.__class__.objects.exclude(pk=self.pk)
+            .filter(slug=self.slug)
+            .exists()
+        )
+
     def save(self, *args, **kwargs):
-        # FIXME: Do this only when the slug field changes.
-        self.slug = create_unique_slug(
-            value=self._slug_value(),
-            model=self.__class__,
-            object_pk=self.pk,
+        using = kwargs.get("using") or router.db_for_write(
+            self.__class__, instance=self
         )
-        super().save(*args, **kwargs)
+        # A failed insert breaks the surrounding transaction, so retry from
+        # a savepoint. Outside of a transaction no savepoint is needed.
+        in_transaction = transaction.get_connection(using).in_atomic_block
+        if not self._slug_needs_update(kwargs):
+            super().save(*args, **kwargs)
+            return
+
+        for attempt in range(self.SLUG_SAVE_ATTEMPTS):
+            self.slug = create_unique_slug(
+                value=self._slug_value(),
+                model=self.__class__,
+                object_pk=self.pk,
+            )
+            try:
+                with (
+                    transaction.atomic(using=using)
+                    if in_transaction
+                    else contextlib.nullcontext()
+                ):
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                last = attempt == self.SLUG_SAVE_ATTEMPTS - 1
+                if last or not self._slug_collides():
+                    raise
 
     class Meta:
         app_label = "tea_django"
@@ -119,9 +353,36 @@ class NonUniqueSlugMixin(SlugMixinBase):
     slug = models.SlugField()
 
     def save(self, *args, **kwargs):
-        self.slug = slugify(self._slug_value())
+        if self._slug_needs_update(kwargs):
+            self.slug = slugify(self._slug_value())
         super().save(*args, **kwargs)
 
     class Meta:
         app_label = "tea_django"
         abstract = True
+
+
+@receiver(post_save, dispatch_uid="tea_django_slug_cache_save")
+@receiver(post_delete, dispatch_uid="tea_django_slug_cache_delete")
+def _invalidate_slug_cache(sender, instance, using, **kwargs):
+    """Remove the current and the previously loaded slug from the cache.
+
+    Until the transaction commits other processes still read the old row
+    and may cache it again, so the slugs are removed again on commit.
+    """
+    cache = getattr(sender, "SLUG_CACHE", None)
+    if cache is None or not isinstance(instance, SlugMixinBase):
+        return
+    # Runs before the loaded values are replaced after the save.
+    slugs = [
+        slug
+        for slug in {
+            instance.__dict__.get("slug"),
+            getattr(instance, "_loaded_values", {}).get("slug"),
+        }
+        if slug
+    ]
+    cache.invalidate(sender, *slugs)
+    transaction.on_commit(
+        lambda: cache.invalidate(sender, *slugs), using=using
+    )
@@ -1,7 +1,119 @@
-from django.db import models
+from typing import Dict, Any
+
+from django.db import models, NotSupportedError
+from django.db.models.functions import Coalesce, Now, Trunc
+from asgiref.sync import sync_to_async
 from tea import timestamp as ts
 
 
+class DurationSeconds(models.Func):
+    """Whole seconds between two datetimes, truncated like `int()`."""
+
+    output_field = models.BigIntegerField()
+    arity = 2
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(
+            f"DurationSeconds is not supported on {connection.vendor}."
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template="TRUNC(EXTRACT(EPOCH FROM (%(expressions)s)))::bigint",
+            arg_joiner=" - ",
+            **extra_context,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Registered by Django on every SQLite connection, in microseconds.
+        return super().as_sql(
+            compiler,
+            connection,
+            template="(django_timestamp_diff(%(expressions)s) / 1000000)",
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        end, start = self.get_source_expressions()
+        return models.Func(
+            start, end, template="TIMESTAMPDIFF(SECOND, %(expressions)s)"
+        ).as_sql(compiler, connection, **extra_context)
+
+
+class TimerQuerySet(models.QuerySet):
+    """Timer queries computed in the database.
+
+    The mixin doesn't declare a manager, set it on the concrete model and
+    combine it with other querysets if needed::
+
+        class RunQuerySet(TimerQuerySet, UUIDBaseQuerySet):
+            pass
+
+        class Run(TimerMixin, UUIDBaseModel):
+            objects = RunQuerySet.as_manager()
+    """
+
+    @staticmethod
+    def elapsed():
+        """Expression of the running duration, as `running_duration`."""
+        return Coalesce(models.F("end_time"), Now()) - models.F("start_time")
+
+    def with_elapsed(self, name: str = "elapsed"):
+        """Annotate the running duration as a `timedelta`."""
+        return self.annotate(**{name: self.elapsed()})
+
+    def running(self):
+        return self.filter(end_time__isnull=True)
+
+    def duration_stats(self) -> Dict[str, Any]:
+        """Return count, total, average, min and max running duration."""
+        elapsed = self.elapsed()
+        return self.aggregate(
+            count=models.Count("pk"),
+            total=models.Sum(elapsed),
+            average=models.Avg(elapsed),
+            min=models.Min(elapsed),
+            max=models.Max(elapsed),
+        )
+
+    def duration_buckets(self, kind: str = "day", field: str = "start_time"):
+        """Aggregate running durations per `Trunc` bucket of a field.
+
+        Returns:
+            Queryset of dicts with `bucket`, `count`, `total` and `average`,
+            ordered by bucket.
+        """
+        elapsed = self.elapsed()
+        return (
+            self.annotate(bucket=Trunc(field, kind))
+            .order_by()
+            .values("bucket")
+            .annotate(
+                count=models.Count("pk"),
+                total=models.Sum(elapsed),
+                average=models.Avg(elapsed),
+            )
+            .order_by("bucket")
+        )
+
+    def stop_all(self) -> int:
+        """Stop all running timers with a single UPDATE.
+
+        Like `stop` and `save`, but `save` is not called and no signals are
+        sent.
+
+        Returns:
+            Number of stopped timers.
+        """
+        now = models.Value(ts.now(), output_field=models.DateTimeField())
+        return self.running().update(
+            end_time=now,
+            duration=DurationSeconds(now, models.F("start_time")),
+        )
+
+
 class TimerMixin(models.Model):
     start_time = models.DateTimeField(
         default=ts.now, null=False, blank=True, editable=True
@@ -37,6 +149,9 @@ class TimerMixin(models.Model):
             self.duration = self.running_duration
         super().save(*args, **kwargs)
 
+    async def asave(self, *args, **kwargs):
+        await sync_to_async(self.save)(*args, **kwargs)
+
     class Meta:
         app_label = "tea_django"
         abstract = True
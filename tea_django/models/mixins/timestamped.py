@@ -1,4 +1,142 @@
+import enum
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
 from django.db import models
+from django.core.exceptions import ValidationError
+
+
+class IndexKind(str, enum.Enum):
+    """Index types for `timestamp_indexes`."""
+
+    btree = "btree"
+    brin = "brin"
+
+
+def timestamp_indexes(
+    kind: IndexKind = IndexKind.btree, pk: str = "id"
+) -> List[models.Index]:
+    """Return indexes for a `TimestampedMixin` model's `Meta.indexes`.
+
+    Indexes are opt-in, add them to the model that uses the mixin::
+
+        class Event(TimestampedMixin, UUIDBaseModel):
+            class Meta:
+                indexes = timestamp_indexes(IndexKind.brin)
+
+    Args:
+        kind: B-tree indexes `(created_on, pk)` for `seek` and
+            `updated_on` for `changed_since`. BRIN indexes are much smaller
+            and suit append-only PostgreSQL tables, where the timestamps
+            follow the physical row order.
+        pk: Primary key field name.
+    """
+    if kind == IndexKind.brin:
+        # Requires PostgreSQL, imported only when used.
+        from django.contrib.postgres.indexes import BrinIndex
+
+        return [
+            BrinIndex(fields=["created_on"]),
+            BrinIndex(fields=["updated_on"]),
+        ]
+    return [
+        models.Index(fields=["created_on", pk]),
+        models.Index(fields=["updated_on"]),
+    ]
+
+
+def encode_cursor(created_on: datetime, pk) -> str:
+    """Encode a `seek` position as an opaque URL safe string."""
+    value = f"{created_on.isoformat()}|{pk}".encode("utf-8")
+    return base64.urlsafe_b64encode(value).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, model=None) -> Tuple[datetime, Any]:
+    """Decode a cursor created by `encode_cursor`.
+
+    Args:
+        cursor: Encoded cursor.
+        model: If provided, the pk is converted to the model's pk type.
+
+    Raises:
+        ValueError: If the cursor is not valid.
+    """
+    try:
+        value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_on, pk = value.decode("utf-8").split("|", 1)
+        created_on = datetime.fromisoformat(created_on)
+        if model is not None:
+            pk = model._meta.pk.to_python(pk)
+        return created_on, pk
+    except (binascii.Error, UnicodeDecodeError, ValueError, ValidationError):
+        raise ValueError("Invalid cursor.")
+
+
+def seek(
+    queryset: models.QuerySet,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    descending: bool = True,
+) -> Tuple[list, Optional[str]]:
+    """Keyset pagination on `(created_on, pk)`.
+
+    Unlike OFFSET pagination, every page costs the same no matter how deep
+    it is, and rows inserted in the meantime don't shift the pages.
+
+    Args:
+        queryset: Queryset of a `TimestampedMixin` model.
+        cursor: Cursor returned with the previous page, `None` for the
+            first page.
+        limit: Page size.
+        descending: Newest rows first.
+
+    Returns:
+        Tuple of the page objects and the cursor of the next page, `None`
+        if this is the last page.
+    """
+    if descending:
+        queryset = queryset.order_by("-created_on", "-pk")
+    else:
+        queryset = queryset.order_by("created_on", "pk")
+    if cursor is not None:
+        created_on, pk = decode_cursor(cursor, queryset.model)
+        op = "lt" if descending else "gt"
+        # The first filter alone bounds the index range scan.
+        queryset = queryset.filter(
+            models.Q(**{f"created_on__{op}e": created_on}),
+            models.Q(**{f"created_on__{op}": created_on})
+            | models.Q(**{f"pk__{op}": pk}),
+        )
+    objs = list(queryset[: limit + 1])
+    if len(objs) <= limit:
+        return objs, None
+    objs = objs[:limit]
+    return objs, encode_cursor(objs[-1].created_on, objs[-1].pk)
+
+
+class TimestampedQuerySet(models.QuerySet):
+    """Keyset pagination and sync queries.
+
+    Set it as the manager of the concrete model::
+
+        class Article(TimestampedMixin, UUIDBaseModel):
+            objects = TimestampedQuerySet.as_manager()
+    """
+
+    def seek(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        descending: bool = True,
+    ) -> Tuple[list, Optional[str]]:
+        """Return a page and the next cursor, see `seek`."""
+        return seek(self, cursor=cursor, limit=limit, descending=descending)
+
+    def changed_since(self, moment: datetime):
+        """Rows updated after `moment`, oldest change first."""
+        return self.filter(updated_on__gt=moment).order_by("updated_on", "pk")
 
 
 class TimestampedMixin(models.Model):
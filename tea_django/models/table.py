@@ -0,0 +1,170 @@
+"""Streaming Rich table rendering of `RichTableMixin` objects.
+
+Rows are rendered page by page, so only one page of objects is kept in
+memory. Querysets are read with `iterator` and, if all `HEADERS` paths are
+model fields, only the displayed columns are fetched::
+
+    render_pages(Article.objects.order_by("created_on"), page_size=100)
+    follow(Article.objects.all(), field="created_on")
+"""
+
+__all__ = ["displayed_fields", "render_pages", "follow"]
+
+import time
+from itertools import islice
+from typing import Optional, List, Set, Iterable, Callable
+
+from rich.console import Console
+from django.db import models
+from django.core.exceptions import FieldDoesNotExist
+
+
+def displayed_fields(model) -> Optional[List[str]]:
+    """Return `only()` arguments for the `HEADERS` of a model.
+
+    Paths like `author.name` become `author__name`. Returns `None` if a
+    path is a callable, a property or a method, all fields are needed then.
+    """
+    fields = []
+    for column in model.HEADERS:
+        if callable(column.path):
+            return None
+        current = model
+        parts = column.path.split(".")
+        for i, part in enumerate(parts):
+            try:
+                field = current._meta.get_field(part)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete:
+                return None
+            if i < len(parts) - 1:
+                if not field.many_to_one and not field.one_to_one:
+                    return None
+                current = field.related_model
+        fields.append("__".join(parts))
+    return fields
+
+
+def _related(model, fields: List[str]) -> Set[str]:
+    """Return the relations to follow for `only()` arguments."""
+    related = set()
+    for path in fields:
+        current = model
+        parts = path.split("__")
+        for i, part in enumerate(parts):
+            try:
+                field = current._meta.get_field(part)
+            except FieldDoesNotExist:
+                # E.g. `pk`.
+                break
+            if not field.is_relation or field.many_to_many:
+                break
+            related.add("__".join(parts[: i + 1]))
+            current = field.related_model
+    return related
+
+
+def _prepare(queryset: models.QuerySet, *extra: str) -> models.QuerySet:
+    fields = displayed_fields(queryset.model)
+    if fields is None:
+        return queryset
+    fields.extend(extra)
+    # Columns showing a related object need it too, not only its key.
+    related = _related(queryset.model, fields)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*fields)
+
+
+def _print_page(console: Console, objs: List):
+    table = objs[0].get_rich_table()
+    for obj in objs:
+        table.add_row(*obj.to_rich_row())
+    console.print(table)
+
+
+def render_pages(
+    objs: Iterable,
+    page_size: int = 50,
+    chunk_size: int = 2000,
+    console: Optional[Console] = None,
+    pause: Optional[Callable[[int], bool]] = None,
+) -> int:
+    """Print objects as a sequence of tables of `page_size` rows.
+
+    Args:
+        objs: Queryset or any iterable of `RichTableMixin` objects.
+        page_size: Number of rows per table.
+        chunk_size: Number of rows fetched from the database at once.
+        console: Console to print to. Default: a new console.
+        pause: Called with the page number after every page except the
+            last one, rendering stops if it returns `False`.
+
+    Returns:
+        Number of printed rows.
+    """
+    console = console or Console()
+    if isinstance(objs, models.QuerySet):
+        objs = _prepare(objs).iterator(chunk_size=chunk_size)
+    objs = iter(objs)
+    count = 0
+    page = list(islice(objs, page_size))
+    number = 1
+    while page:
+        _print_page(console, page)
+        count += len(page)
+        page = list(islice(objs, page_size))
+        if page and pause is not None and not pause(number):
+            break
+        number += 1
+    return count
+
+
+def follow(
+    queryset: models.QuerySet,
+    field: str = "pk",
+    interval: float = 1.0,
+    last: int = 10,
+    chunk_size: int = 2000,
+    console: Optional[Console] = None,
+    stop: Optional[Callable[[], bool]] = None,
+):
+    """Print the last rows and then new rows as they appear, like `tail -f`.
+
+    New rows are found with `field > last seen value`, so the field must
+    increase with every insert, e.g. `created_on` or the id of a
+    `UUID7BaseModel`. Rows inserted later with a smaller value, or with
+    the same value after it was seen, are not printed.
+
+    Args:
+        queryset: Rows to follow.
+        field: Increasing field used to find new rows.
+        interval: Seconds between polls.
+        last: Number of existing rows to print first.
+        chunk_size: Number of rows fetched from the database at once.
+        console: Console to print to. Default: a new console.
+        stop: Called before every poll, following stops if it returns
+            `True`. Default: follow until interrupted.
+    """
+    console = console or Console()
+    queryset = _prepare(queryset, field).order_by(field)
+    objs = list(queryset.reverse()[:last])[::-1]
+    if objs:
+        _print_page(console, objs)
+    value = getattr(objs[-1], field) if objs else None
+
+    while stop is None or not stop():
+        time.sleep(interval)
+        new = queryset
+        if value is not None:
+            new = new.filter(**{f"{field}__gt": value})
+        page = []
+        for obj in new.iterator(chunk_size=chunk_size):
+            page.append(obj)
+            if len(page) == chunk_size:
+                _print_page(console, page)
+                page = []
+            value = getattr(obj, field)
+        if page:
+            _print_page(console, page)
@@ -1,52 +1,189 @@
+import json
 import uuid
-from typing import Dict, Any
+from itertools import islice
+from datetime import date, datetime, timezone
+from typing import Dict, Any, Iterator, Iterable, Optional, Tuple, Union, IO
 
-from django.db import models
+from django.db import models, router, transaction, connections
 from django.utils.functional import classproperty
-from tea import timestamp as ts
 from tea_console.table import RichTableMixin
 
+from tea_django.models.uuid7 import uuid7, uuid7_time, uuid7_min
+
+
+def _parse_datetime(value):
+    # Equivalent of `ts.from_utc_str` without the strptime overhead.
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _parse_date(value):
+    if value is None or (
+        isinstance(value, date) and not isinstance(value, datetime)
+    ):
+        return value
+    return _parse_datetime(value).date()
+
+
+def _parse_uuid(value):
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(value)
+
+
+class UUIDBaseQuerySet(models.QuerySet):
+    def column_dicts(self, chunk_size: int = 2000) -> Iterator[Dict[str, Any]]:
+        """Yield `column_dict` of every row without creating instances.
+
+        Rows are fetched with `values_list` in chunks of `chunk_size`.
+        """
+        names = self.model.column_names()
+        for row in self.values_list(*names).iterator(chunk_size=chunk_size):
+            yield dict(zip(names, row))
+
+    def id_time_range(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ):
+        """Filter rows with time-ordered ids created in `[start, end)`.
+
+        Only meaningful for `UUID7BaseModel` subclasses, the filter is a
+        primary key range, so no timestamp column or index is needed.
+        """
+        queryset = self
+        if start is not None:
+            queryset = queryset.filter(pk__gte=uuid7_min(start))
+        if end is not None:
+            queryset = queryset.filter(pk__lt=uuid7_min(end))
+        return queryset
+
 
 class UUIDBaseModel(models.Model, RichTableMixin):
     """Base model with UUID as a primary key."""
 
     id = models.UUIDField(default=uuid.uuid4, primary_key=True)
 
+    objects = UUIDBaseQuerySet.as_manager()
+
     @classproperty
     def class_name(cls):
         return cls.__name__
 
+    @classmethod
+    def column_names(cls) -> Tuple[str, ...]:
+        """Return the `column_dict` keys, computed once per class."""
+        # Looked up in the class itself, subclasses have their own fields.
+        names = cls.__dict__.get("_column_names")
+        if names is None:
+            names = tuple(
+                f"{field.name}_id"
+                if isinstance(field, models.ForeignKey)
+                else field.name
+                for field in cls._meta.fields
+            )
+            cls._column_names = names
+        return names
+
     def column_dict(self) -> Dict[str, Any]:
-        d = {}
-        for field in self._meta.fields:
-            if isinstance(field, models.ForeignKey):
-                name = f"{field.name}_id"
-            else:
-                name = field.name
-            d[name] = getattr(self, name)
-        return d
+        return {name: getattr(self, name) for name in self.column_names()}
 
     def to_dict(self):
         return self.column_dict()
 
     @classmethod
     def from_dict(cls, d: dict):
-        model_d = {}
-        for field in cls._meta.fields:
-            if isinstance(field, models.DateTimeField):
-                field.auto_now = False
-                field.auto_now_add = False
-                model_d[field.name] = ts.from_utc_str(d[field.name])
-            elif isinstance(field, models.DateField):
-                field.auto_now = False
-                field.auto_now_add = False
-                model_d[field.name] = ts.from_utc_str(d[field.name]).date()
-            elif isinstance(field, models.ForeignKey):
-                key = f"{field.name}_id"
-                model_d[key] = uuid.UUID(d[key])
-            else:
-                model_d[field.name] = d[field.name]
-        return cls(**model_d)
+        """Create an unsaved instance from a `to_dict` dict.
+
+        Auto timestamps are set again when the instance is saved, use
+        `from_dicts` to insert them as they are.
+        """
+        return cls(
+            **{
+                attname: d[key] if convert is None else convert(d[key])
+                for key, attname, convert in cls._converter_plan()
+            }
+        )
+
+    @classmethod
+    def _converter_plan(cls):
+        """Return `(key, attname, converter)` of every field, see `from_dict`.
+
+        Computed once per class, converter is `None` for values that are
+        used as they are.
+        """
+        plan = cls.__dict__.get("_converters")
+        if plan is None:
+            plan = []
+            for field in cls._meta.fields:
+                if isinstance(field, models.DateTimeField):
+                    plan.append((field.name, field.attname, _parse_datetime))
+                elif isinstance(field, models.DateField):
+                    plan.append((field.name, field.attname, _parse_date))
+                elif isinstance(field, models.ForeignKey):
+                    plan.append((field.attname, field.attname, _parse_uuid))
+                else:
+                    plan.append((field.name, field.attname, None))
+            cls._converters = plan
+        return plan
+
+    @classmethod
+    def from_dicts(
+        cls,
+        data: Union[Iterable[dict], IO],
+        batch_size: int = 1000,
+        preserve_timestamps: bool = True,
+        using: str = None,
+    ) -> int:
+        """Bulk insert objects from `to_dict` dicts.
+
+        Every batch is inserted in its own transaction, a failure rolls back
+        only the current batch. No `save` methods or signals are called.
+
+        Args:
+            data: Iterable of dicts, or a file with one JSON dict per line.
+            batch_size: Number of objects inserted at once.
+            preserve_timestamps: Insert the `auto_now` and `auto_now_add`
+                values from the dicts, like fixtures do. Otherwise they are
+                set to the current time.
+            using: Database alias. Default: the router's write database.
+
+        Returns:
+            Number of inserted objects.
+        """
+        if hasattr(data, "read"):
+            data = (json.loads(line) for line in data if line.strip())
+        using = using or router.db_for_write(cls)
+        fields = cls._meta.concrete_fields
+        ops = connections[using].ops
+        queryset = cls.objects.using(using)
+
+        data = iter(data)
+        count = 0
+        while True:
+            objs = [cls.from_dict(d) for d in islice(data, batch_size)]
+            if not objs:
+                return count
+            with transaction.atomic(using=using):
+                if preserve_timestamps:
+                    # A raw insert doesn't call `pre_save`, so auto
+                    # timestamps keep their values. Field objects are not
+                    # modified. Unlike `bulk_create` it doesn't respect the
+                    # backend's query size limit, so split the batch.
+                    size = max(1, ops.bulk_batch_size(fields, objs))
+                    for i in range(0, len(objs), size):
+                        queryset._insert(
+                            objs[i : i + size], fields=fields, raw=True
+                        )
+                    for obj in objs:
+                        obj._state.adding = False
+                        obj._state.db = using
+                else:
+                    queryset.bulk_create(objs)
+            count += len(objs)
 
     def __str__(self):
         return f"{self.class_name}({self.id})"
@@ -56,3 +193,24 @@ class UUIDBaseModel(models.Model, RichTableMixin):
     class Meta:
         app_label = "tea_django"
         abstract = True
+
+
+class UUID7BaseModel(UUIDBaseModel):
+    """Base model with a time-ordered UUID as a primary key.
+
+    New rows are appended to the end of the primary key index. Switching an
+    existing `UUIDBaseModel` subclass only changes the field default, the
+    generated migration doesn't touch the database and old random keys stay
+    valid.
+    """
+
+    id = models.UUIDField(default=uuid7, primary_key=True)
+
+    @property
+    def id_time(self) -> datetime:
+        """Creation time embedded in the id."""
+        return uuid7_time(self.id)
+
+    class Meta:
+        app_label = "tea_django"
+        abstract = True
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+from rest_framework.response import Response
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
+
+from tea_django.models.mixins.timestamped import seek
+
+
+class KeysetPagination(BasePagination):
+    """Keyset pagination of `TimestampedMixin` querysets.
+
+    Pages are ordered by `(created_on, pk)` and linked with an opaque
+    cursor, deep pages are as fast as the first one. An invalid cursor
+    raises `ValueError`, which `tea_django_exception_handler` turns into a
+    400 response.
+    """
+
+    page_size = 50
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    descending = True
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(
+                request.query_params.get(
+                    self.page_size_query_param, self.page_size
+                )
+            )
+        except ValueError:
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        objs, self.next_cursor = seek(
+            queryset,
+            cursor=request.query_params.get(self.cursor_query_param),
+            limit=self.get_page_size(request),
+            descending=self.descending,
+        )
+        return objs
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor,
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict([("next", self.get_next_link()), ("results", data)])
+        )
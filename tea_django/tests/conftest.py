@@ -0,0 +1,57 @@
+from unittest import mock
+
+import django
+import pytest
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+
+from tea_django.database.postgresql import PostgreSQL
+
+if not settings.configured:
+    settings.configure(
+        SECRET_KEY="tests",
+        USE_TZ=True,
+        INSTALLED_APPS=["tea_django.tests"],
+        DATABASES={
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": ":memory:",
+            }
+        },
+        DEFAULT_AUTO_FIELD="django.db.models.AutoField",
+    )
+    django.setup()
+
+
+@pytest.fixture(scope="session")
+def tables():
+    """Create the tables of the test models."""
+    models = list(apps.get_app_config("tests").get_models())
+    with connection.schema_editor() as editor:
+        for model in models:
+            editor.create_model(model)
+    return models
+
+
+@pytest.fixture
+def db(tables):
+    """Database access, all rows are deleted after the test."""
+    yield
+    for model in tables:
+        model._base_manager.all().delete()
+
+
+@pytest.fixture
+def postgres():
+    """PostgreSQL backend of a database that is never connected to."""
+    database = {
+        "ENGINE": "django.db.backends.postgresql",
+        "HOST": "localhost",
+        "PORT": "5432",
+        "USER": "postgres",
+        "PASSWORD": "",
+        "NAME": "app",
+    }
+    with mock.patch.dict(settings.DATABASES, {"postgres": database}):
+        yield PostgreSQL(alias="postgres")
@@ -0,0 +1,96 @@
+from django.db import models
+from tea_console.table import Column
+
+from tea_django.models import UUIDBaseModel, UUIDBaseQuerySet
+from tea_django.models.cache import SlugCache
+from tea_django.models.mixins import (
+    UniqueSlugMixin,
+    NonUniqueSlugMixin,
+    TimerMixin,
+    TimerQuerySet,
+    TimestampedMixin,
+    TimestampedQuerySet,
+)
+
+
+class Thing(UniqueSlugMixin, UUIDBaseModel):
+    name = models.CharField(max_length=100)
+    counter = models.IntegerField(default=0)
+
+    class Meta:
+        app_label = "tests"
+
+
+class Tag(NonUniqueSlugMixin, UUIDBaseModel):
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        app_label = "tests"
+
+
+class PlainTimer(TimerMixin):
+    class Meta:
+        app_label = "tests"
+
+
+class RunQuerySet(TimerQuerySet, UUIDBaseQuerySet):
+    pass
+
+
+class Run(TimerMixin, UUIDBaseModel):
+    name = models.CharField(max_length=100, default="")
+
+    objects = RunQuerySet.as_manager()
+
+    class Meta:
+        app_label = "tests"
+
+
+class PlainStamp(TimestampedMixin):
+    class Meta:
+        app_label = "tests"
+
+
+class PostQuerySet(TimestampedQuerySet, UUIDBaseQuerySet):
+    pass
+
+
+class Post(TimestampedMixin, UUIDBaseModel):
+    name = models.CharField(max_length=100, default="")
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        app_label = "tests"
+
+
+class CachedThing(UniqueSlugMixin, UUIDBaseModel):
+    name = models.CharField(max_length=100)
+
+    SLUG_CACHE = SlugCache(max_size=10, timeout=60)
+
+    class Meta:
+        app_label = "tests"
+
+
+class Owner(UUIDBaseModel):
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        app_label = "tests"
+
+    def __str__(self):
+        return self.name
+
+
+class Item(UUIDBaseModel):
+    name = models.CharField(max_length=100)
+    owner = models.ForeignKey(Owner, on_delete=models.CASCADE)
+
+    HEADERS = [
+        Column(title="Name", path="name"),
+        Column(title="Owner", path="owner"),
+    ]
+
+    class Meta:
+        app_label = "tests"
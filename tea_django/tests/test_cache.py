@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from tea_django.models.cache import LRUCache
+from tea_django.tests.models import CachedThing
+
+
+@pytest.fixture
+def cache(db):
+    cache = CachedThing.SLUG_CACHE
+    cache.backend.clear()
+    cache.stats.hits = cache.stats.misses = 0
+    return cache
+
+
+def test_lru_cache_evicts_oldest():
+    lru = LRUCache(max_size=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == (1, None, 3)
+
+
+def test_lru_cache_expires():
+    lru = LRUCache(timeout=-1)
+    lru.set("a", 1)
+    assert lru.get("a") is None
+
+
+def test_hit_avoids_query(cache):
+    CachedThing.objects.create(name="Hello")
+    first = CachedThing.get_by_slug("hello")
+    with CaptureQueriesContext(connection) as queries:
+        second = CachedThing.get_by_slug("hello")
+    assert len(queries) == 0
+    assert second == first and second is not first
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_slug_change_invalidates_old_slug(cache):
+    thing = CachedThing.objects.create(name="Hello")
+    CachedThing.get_by_slug("hello")
+    thing.name = "Other"
+    thing.save()
+    with pytest.raises(CachedThing.DoesNotExist):
+        CachedThing.get_by_slug("hello")
+
+
+def test_delete_invalidates(cache):
+    thing = CachedThing.objects.create(name="Hello")
+    CachedThing.get_by_slug("hello")
+    thing.delete()
+    with pytest.raises(CachedThing.DoesNotExist):
+        CachedThing.get_by_slug("hello")
+
+
+def test_invalidates_again_on_commit(cache):
+    thing = CachedThing.objects.create(name="Hello")
+    with transaction.atomic():
+        thing.name = "Other"
+        thing.save()
+        # Another process still reads the old row and caches it again.
+        cache.backend.set(cache.key(CachedThing, "hello"), "stale")
+    assert cache.backend.get(cache.key(CachedThing, "hello")) is None
@@ -0,0 +1,24 @@
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+
+def test_db_commands_import_without_settings():
+    # The settings of the test session are configured in this process.
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key != "DJANGO_SETTINGS_MODULE"
+    }
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, tea_django.commands.db; "
+            "assert 'tea_django.models' not in sys.modules",
+        ],
+        env=env,
+        cwd=Path(__file__).parents[2],
+        check=True,
+    )
@@ -0,0 +1,91 @@
+import gzip
+import json
+from unittest import mock
+
+import pytest
+
+from tea_django.database.incremental import IncrementalDump, TABLES_SQL
+from tea_django.database.postgresql import PostgreSQLError
+from tea_django.tests.utils import failing_psql
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    manifest = {
+        "tables": {},
+        "pre_data": "pre-data.sql.gz",
+        "sequences": None,
+        "post_data": "post-data.sql.gz",
+    }
+    (tmp_path / IncrementalDump.MANIFEST).write_text(json.dumps(manifest))
+    for name in ("pre-data.sql.gz", "post-data.sql.gz"):
+        (tmp_path / name).write_bytes(gzip.compress(b"SELECT 1;\n"))
+    return tmp_path
+
+
+def test_load_fails_on_sql_error(postgres, snapshot):
+    with mock.patch.object(postgres, "pipe", failing_psql):
+        with pytest.raises(PostgreSQLError):
+            IncrementalDump(postgres).load(snapshot)
+
+
+class FakeCursor:
+    """Cursor returning the current counters and checksums of tables."""
+
+    def __init__(self, counters, checksums):
+        self.counters = counters
+        self.checksums = checksums
+        self.checksummed = []
+        self.result = None
+
+    def execute(self, sql, params=None):
+        if sql == TABLES_SQL:
+            self.result = [
+                (*name.split("."), *values)
+                for name, values in self.counters.items()
+            ]
+        elif "md5" in sql:
+            name = sql.split("FROM ")[1].split(" AS")[0].replace('"', "")
+            self.checksummed.append(name)
+            self.result = [self.checksums[name]]
+        else:
+            self.result = [(None,)]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0]
+
+
+def _entry(name, rows, checksum):
+    schema, table = name.split(".")
+    return dict(
+        schema=schema, table=table, rows=rows, checksum=checksum, changed=False
+    )
+
+
+def test_recheck_finds_late_counted_writes(postgres):
+    dump = IncrementalDump(postgres)
+    dump.STATS_DELAY = 0
+    counters = {"public.a": [1, 1, 0, 0], "public.b": [1, 1, 0, 0]}
+    tables = {
+        "public.a": _entry("public.a", 1, "10"),
+        "public.b": _entry("public.b", 1, "20"),
+    }
+    # The write to `a` was counted only after the counters were read.
+    cursor = FakeCursor(
+        {"public.a": [2, 2, 0, 0], "public.b": [1, 1, 0, 0]},
+        {"public.a": (2, "30"), "public.b": (1, "20")},
+    )
+    changed = dump._recheck(
+        cursor, counters, 0.0, tables, ["public.a", "public.b"]
+    )
+    assert changed == ["public.a"]
+    assert cursor.checksummed == ["public.a"]
+    assert tables["public.a"]["changed"]
+    assert (tables["public.a"]["rows"], tables["public.a"]["checksum"]) == (
+        2,
+        "30",
+    )
+    assert not tables["public.b"]["changed"]
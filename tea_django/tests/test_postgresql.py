@@ -0,0 +1,68 @@
+import gzip
+from unittest import mock
+
+import pytest
+
+from tea_django.database.postgresql import DumpFormat, PostgreSQLError
+from tea_django.database.store import DumpStore
+from tea_django.tests.utils import failing_psql
+
+
+@pytest.fixture
+def plain_dump(tmp_path):
+    filename = tmp_path / "app.backup"
+    filename.write_text("SELECT * FROM missing;\n")
+    return filename
+
+
+@pytest.fixture
+def gzip_dump(tmp_path):
+    filename = tmp_path / "app.backup.gz"
+    filename.write_bytes(gzip.compress(b"SELECT * FROM missing;\n"))
+    return filename
+
+
+@pytest.mark.parametrize("dump", ["plain_dump", "gzip_dump"])
+def test_restore_fails_on_sql_error(postgres, dump, request):
+    filename = request.getfixturevalue(dump)
+    with mock.patch.object(postgres, "pipe", failing_psql):
+        with pytest.raises(PostgreSQLError):
+            postgres.restore(filename)
+
+
+def test_failed_swap_load_drops_scratch_database(postgres, plain_dump):
+    with mock.patch.multiple(
+        postgres,
+        pipe=failing_psql,
+        delete_and_create=mock.DEFAULT,
+        psql=mock.DEFAULT,
+        analyze=mock.DEFAULT,
+        swap=mock.DEFAULT,
+    ) as mocks:
+        with pytest.raises(PostgreSQLError):
+            postgres.load(plain_dump, swap=True)
+    mocks["delete_and_create"].assert_called_once_with(database="app_restore")
+    mocks["psql"].assert_called_once_with(
+        "DROP DATABASE IF EXISTS app_restore"
+    )
+    mocks["analyze"].assert_not_called()
+    mocks["swap"].assert_not_called()
+
+
+def test_load_snapshot_fails_on_sql_error(postgres, tmp_path):
+    store = DumpStore(tmp_path)
+    with store.writer("app-1", database="app") as writer:
+        writer.write(b"SELECT * FROM missing;\n")
+    with mock.patch.multiple(
+        postgres, pipe=failing_psql, delete_and_create=mock.DEFAULT
+    ):
+        with pytest.raises(PostgreSQLError):
+            postgres.load_snapshot(store, "app-1")
+
+
+def test_incremental_dump_passes_verify(postgres, tmp_path):
+    with mock.patch(
+        "tea_django.database.postgresql.IncrementalDump"
+    ) as incremental:
+        postgres.dump(tmp_path, format=DumpFormat.incremental, verify=True)
+    assert incremental.call_args.kwargs["verify"] is True
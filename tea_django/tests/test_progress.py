@@ -0,0 +1,32 @@
+from tea_django.database.progress import Metrics
+
+
+def _scan(*chunks):
+    events = []
+    metrics = Metrics(on_progress=events.append, interval=0)
+    with metrics.phase("restore") as event:
+        for chunk in chunks:
+            metrics.feed(chunk)
+        return event.table, event.processed
+
+
+def test_scan_finds_last_table_in_chunk():
+    chunk = (
+        b"SET x = 1;\nCOPY public.a (id) FROM stdin;\n1\n\\.\n"
+        b"COPY public.b (id) FROM stdin;\n2\n"
+    )
+    assert _scan(chunk) == ("public.b", len(chunk))
+
+
+def test_scan_table_at_chunk_start():
+    assert _scan(b"COPY public.c (id) FROM stdin;\n")[0] == "public.c"
+
+
+def test_scan_keeps_table_without_copy():
+    assert _scan(b"\nCOPY public.a (id) FROM stdin;\n", b"1\n2\n")[0] == (
+        "public.a"
+    )
+
+
+def test_disabled_metrics():
+    assert not Metrics().enabled
@@ -0,0 +1,146 @@
+from unittest import mock
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from tea_django.models.mixins import slug as slug_module
+from tea_django.models.mixins.slug import (
+    base_slug,
+    next_free_slug,
+    taken_slugs,
+    taken_slugs_bulk,
+    create_unique_slug,
+)
+from tea_django.tests.models import Thing, Tag
+
+
+def test_base_slug_cuts_on_word_boundary():
+    assert base_slug("Hello big World", max_length=9) == "hello-big"
+    assert base_slug("Hello big World", max_length=8) == "hello"
+
+
+def test_next_free_slug():
+    assert next_free_slug("foo", set()) == "foo"
+    assert next_free_slug("foo", {"foo"}) == "foo-1"
+    assert next_free_slug("foo", {"foo", "foo-1", "foo-3"}) == "foo-2"
+    # Longer slugs with the same prefix are not suffixes.
+    assert next_free_slug("foo", {"foo", "foo-bar", "foo-1-2"}) == "foo-1"
+
+
+def _insert(*slugs):
+    # `save` would recompute the slugs.
+    Thing.objects.bulk_create(Thing(name="x", slug=slug) for slug in slugs)
+
+
+def test_taken_slugs(db):
+    _insert("foo", "foo-1", "foo-bar", "foo-12", "foobar")
+    assert taken_slugs("foo", Thing.objects.all()) == {
+        "foo",
+        "foo-1",
+        "foo-12",
+    }
+
+
+def test_taken_slugs_bulk(db):
+    _insert("foo", "foo-2", "bar-1", "baz")
+    taken = taken_slugs_bulk(["foo", "bar", "bar", "qux"], Thing.objects, 1)
+    # `bar` is repeated, so its suffixes are fetched even if it's not taken.
+    assert taken == {"foo", "foo-2", "bar-1"}
+
+
+def test_create_unique_slug(db):
+    first = Thing.objects.create(name="Hello World")
+    assert first.slug == "hello-world"
+    second = Thing.objects.create(name="Hello World")
+    assert second.slug == "hello-world-1"
+    # The object itself doesn't collide with its own slug.
+    assert create_unique_slug("Hello World", Thing, first.pk) == "hello-world"
+
+
+def test_save_uses_two_queries(db):
+    Thing.objects.create(name="Hello")
+    with CaptureQueriesContext(connection) as queries:
+        Thing.objects.create(name="Hello")
+    # Slug candidates and the insert.
+    assert len(queries) == 2
+
+
+def test_assign_slugs_resolves_batch_collisions(db):
+    Thing.objects.create(name="foo")
+    objs = Thing.bulk_create_with_slugs(
+        [Thing(name="foo"), Thing(name="foo"), Thing(name="foo 1")]
+    )
+    assert [obj.slug for obj in objs] == ["foo-1", "foo-2", "foo-1-1"]
+    assert Thing.objects.count() == 4
+
+
+def test_assign_slugs_with_suffix_collision(db):
+    objs = Thing.assign_slugs(
+        [Thing(name="foo"), Thing(name="foo"), Thing(name="foo-1")]
+    )
+    slugs = [obj.slug for obj in objs]
+    assert len(set(slugs)) == 3
+
+    # `foo-1` is taken only inside the batch, by the second `foo`.
+    _insert("foo-1-1")
+    objs = Thing.bulk_create_with_slugs(
+        [Thing(name="foo"), Thing(name="foo"), Thing(name="foo 1")]
+    )
+    assert [obj.slug for obj in objs] == ["foo", "foo-1", "foo-1-2"]
+
+
+def _stale_slugs(stale):
+    """Return `stale` slugs first, like a concurrent writer took them."""
+    real = slug_module.create_unique_slug
+    values = list(stale)
+
+    def create(**kwargs):
+        return values.pop(0) if values else real(**kwargs)
+
+    return mock.patch.object(slug_module, "create_unique_slug", create)
+
+
+def test_save_retries_on_concurrent_slug(db):
+    Thing.objects.create(name="taken")
+    thing = Thing(name="taken")
+    with _stale_slugs(["taken"]):
+        thing.save()
+    assert thing.slug == "taken-1"
+
+
+def test_save_retries_inside_transaction(db):
+    Thing.objects.create(name="taken")
+    with transaction.atomic():
+        thing = Thing(name="taken")
+        with _stale_slugs(["taken", "taken"]):
+            thing.save()
+        # The surrounding transaction is still usable.
+        assert Thing.objects.count() == 2
+    assert thing.slug == "taken-1"
+
+
+def test_save_gives_up_after_attempts(db):
+    Thing.objects.create(name="taken")
+    thing = Thing(name="taken")
+    with _stale_slugs(["taken"] * Thing.SLUG_SAVE_ATTEMPTS):
+        with pytest.raises(IntegrityError):
+            thing.save()
+
+
+def test_slug_is_not_recomputed_if_name_is_unchanged(db):
+    thing = Thing.objects.create(name="Hello")
+    thing.counter = 1
+    with CaptureQueriesContext(connection) as queries:
+        thing.save()
+    assert len(queries) == 1
+    thing.name = "Other"
+    thing.save(update_fields=["name"])
+    thing.refresh_from_db()
+    assert thing.slug == "other"
+
+
+def test_non_unique_slug(db):
+    first = Tag.objects.create(name="Hello World")
+    second = Tag.objects.create(name="Hello World")
+    assert first.slug == second.slug == "hello-world"
@@ -0,0 +1,66 @@
+import sqlite3
+import contextlib
+from unittest import mock
+
+import pytest
+from django.conf import settings
+
+from tea_django.errors import DatabaseError
+from tea_django.database.sqlite import SQLite
+
+
+def _query(filename, sql):
+    with contextlib.closing(sqlite3.connect(filename)) as connection:
+        with connection:
+            return connection.execute(sql).fetchall()
+
+
+@pytest.fixture
+def sqlite(tmp_path):
+    filename = tmp_path / "app.sqlite3"
+    _query(filename, "CREATE TABLE t (x TEXT)")
+    _query(
+        filename,
+        "INSERT INTO t "
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+        "WHERE i < 1000) SELECT printf('%0500d', i) FROM n",
+    )
+    database = {"ENGINE": "django.db.backends.sqlite3", "NAME": filename}
+    with mock.patch.dict(settings.DATABASES, {"sqlite": database}):
+        yield SQLite(alias="sqlite")
+
+
+def _count(filename):
+    return _query(filename, "SELECT count(*) FROM t")[0][0]
+
+
+def test_dump_and_load(sqlite, tmp_path):
+    filename = sqlite.dump(tmp_path / "dumps", tag="test")
+    assert filename.endswith("-test.sqlite3")
+    assert _count(filename) == 1000
+    _query(sqlite.database, "DELETE FROM t")
+    sqlite.load(filename)
+    assert _count(sqlite.database) == 1000
+
+
+def test_dump_replaces_existing_file(sqlite, tmp_path):
+    existing = tmp_path / "existing.sqlite3"
+    existing.write_bytes(b"not a database")
+    with mock.patch.object(sqlite, "dump_filename", return_value=existing):
+        sqlite.dump(tmp_path, delete=True)
+    assert _count(existing) == 1000
+
+
+def test_dump_reports_progress(sqlite, tmp_path):
+    progress = mock.Mock()
+    sqlite.dump(tmp_path, pages=10, progress=progress)
+    steps = [call.args for call in progress.call_args_list]
+    assert len(steps) > 1
+    copied, total = steps[-1]
+    assert copied == total > 0
+
+
+def test_load_missing_file(sqlite, tmp_path):
+    with pytest.raises(DatabaseError):
+        sqlite.load(tmp_path / "missing.sqlite3")
+    assert _count(sqlite.database) == 1000
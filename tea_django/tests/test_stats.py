@@ -0,0 +1,41 @@
+import json
+from unittest import mock
+
+import pytest
+from tea_console.enums import ConsoleFormat
+
+from tea_django.commands import db
+from tea_django.database.stats import DatabaseStats, QueryStats
+
+QUERY = "SELECT '[b]' AS tag, " + ", ".join(f"c{i}" for i in range(50))
+
+
+@pytest.fixture
+def result():
+    return DatabaseStats(
+        database="app",
+        queries=[
+            QueryStats(
+                query=QUERY, calls=1, total_time=1.0, mean_time=1.0, rows=1
+            )
+        ],
+        statements_available=True,
+    )
+
+
+def _stats(result, format):
+    with mock.patch.object(db, "PostgreSQL"), mock.patch.object(
+        db, "collect_stats", return_value=result
+    ):
+        db.stats(limit=10, format=format, using="default")
+
+
+def test_json_output_is_not_wrapped_or_parsed(result, capsys):
+    _stats(result, ConsoleFormat.json)
+    data = json.loads(capsys.readouterr().out)
+    assert data["queries"][0]["query"] == QUERY
+
+
+def test_text_output_escapes_queries(result, capsys):
+    _stats(result, ConsoleFormat.text)
+    assert "'[b]'" in capsys.readouterr().out
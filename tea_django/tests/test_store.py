@@ -0,0 +1,175 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from tea_django.commands import db
+from tea_django.errors import DatabaseError
+from tea_django.database.store import DumpStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DumpStore(tmp_path / "store")
+    store.min_chunk_size = 16
+    store.max_chunk_size = 64
+    store.boundary_mask = 0x3
+    # Every unreferenced chunk can be collected.
+    store.gc_grace_period = -1
+    return store
+
+
+def _dump(lines):
+    return b"".join(f"INSERT INTO t VALUES ({i});\n".encode() for i in lines)
+
+
+def _snapshot(store, name, data, created=None):
+    with store.writer(name, database="app", created=created) as writer:
+        writer.write(data)
+    return store.get(name)
+
+
+def _chunk_count(store):
+    return len(list((store.root / store.CHUNKS).glob("*/*")))
+
+
+def test_gc_keeps_chunks_of_snapshot_being_written(store):
+    writer = store.writer("app-1", database="app")
+    writer.write(_dump(range(100)))
+    assert _chunk_count(store) > 0
+    assert store.gc() == (0, 0)
+    writer.close()
+    assert store.read("app-1")
+
+
+def test_gc_removes_chunks_of_crashed_writer(store):
+    writer = store.writer("app-1", database="app")
+    writer.write(_dump(range(100)))
+    # The process died, its lock is released but the journal is left.
+    writer._journal.close()
+    count, _ = store.gc()
+    assert count > 0
+    assert _chunk_count(store) == 0
+    assert not list((store.root / store.WRITING).iterdir())
+
+
+def test_gc_removes_chunks_of_failed_writer(store):
+    with pytest.raises(RuntimeError):
+        with store.writer("app-1", database="app") as writer:
+            writer.write(_dump(range(100)))
+            raise RuntimeError
+    store.gc()
+    assert _chunk_count(store) == 0
+
+
+def test_prune_dry_run_counts_chunks_of_deleted_snapshots(store, capsys):
+    _snapshot(store, "old", _dump(range(100)), datetime(2020, 1, 1))
+    _snapshot(store, "new", _dump(range(1000, 1100)), datetime(2020, 1, 2))
+    chunks = _chunk_count(store)
+    # The command uses the default grace period.
+    hours_ago = time.time() - 7200
+    for path in (store.root / store.CHUNKS).glob("*/*"):
+        os.utime(path, (hours_ago, hours_ago))
+    db.store_prune(store.root, daily=1, weekly=0, monthly=0, dry_run=True)
+    output = capsys.readouterr().out
+    assert "Would delete snapshot old" in output
+    assert "Would delete 0 chunks" not in output
+    assert _chunk_count(store) == chunks
+    assert [snapshot.name for snapshot in store.snapshots()] == ["old", "new"]
+
+
+def test_chunking_round_trip(store):
+    data = _dump(range(200)) + b"x" * 200 + b"\n" + _dump(range(5))
+    writer = store.writer("app-1", database="app")
+    # Writes don't line up with lines or chunks.
+    for i in range(0, len(data), 7):
+        writer.write(data[i : i + 7])
+    writer.close()
+
+    snapshot = store.get("app-1")
+    assert snapshot.size == len(data)
+    # Chunks end after a line once they reach the maximal size.
+    chunks = [store.get_chunk(digest) for digest in snapshot.chunks]
+    assert all(len(chunk) < store.max_chunk_size + 32 for chunk in chunks)
+    assert b"".join(store.read("app-1")) == data
+    with store.open("app-1") as f:
+        assert f.read() == data
+
+
+def test_snapshots_deduplicate(store):
+    first = _snapshot(store, "app-1", _dump(range(1000)))
+    chunks = _chunk_count(store)
+    # One changed row only changes the chunks around it.
+    second = _snapshot(
+        store, "app-2", _dump([*range(500), 9999, *range(501, 1000)])
+    )
+    shared = set(first.chunks) & set(second.chunks)
+    assert len(shared) >= len(set(first.chunks)) - 3
+    assert _chunk_count(store) <= chunks + 3
+
+
+def test_writer_rejects_existing_name(store):
+    _snapshot(store, "app-1", b"SELECT 1;\n")
+    with pytest.raises(DatabaseError):
+        store.writer("app-1", database="app")
+
+
+def _names(snapshots):
+    return [snapshot.name for snapshot in snapshots]
+
+
+def test_retain(store):
+    for name, database, created in [
+        ("december", "app", datetime(2019, 12, 15)),
+        ("january", "app", datetime(2020, 1, 15)),
+        ("february", "app", datetime(2020, 2, 15)),
+        ("previous-week", "app", datetime(2020, 3, 2)),
+        ("monday", "app", datetime(2020, 3, 9)),
+        ("tuesday-morning", "app", datetime(2020, 3, 10, 8)),
+        ("tuesday-evening", "app", datetime(2020, 3, 10, 20)),
+        ("other", "other", datetime(2019, 1, 1)),
+    ]:
+        with store.writer(name, database=database, created=created) as w:
+            w.write(b"SELECT 1;\n")
+
+    rules = dict(daily=2, weekly=2, monthly=3)
+    deleted = store.retain(dry_run=True, **rules)
+    assert _names(deleted) == ["tuesday-morning", "december"]
+    assert len(store.snapshots()) == 8
+
+    assert _names(store.retain(**rules)) == _names(deleted)
+    assert _names(store.snapshots()) == [
+        "other",
+        "january",
+        "february",
+        "previous-week",
+        "monday",
+        "tuesday-evening",
+    ]
+
+
+def test_retain_keeps_newest_snapshot(store):
+    _snapshot(store, "app-1", b"SELECT 1;\n")
+    assert store.retain(daily=0, weekly=0, monthly=0) == []
+
+
+def test_gc_deletes_only_unreferenced_chunks(store):
+    _snapshot(store, "app-1", _dump(range(1000)))
+    _snapshot(store, "app-2", _dump(range(500, 1500)))
+    chunks = _chunk_count(store)
+    store._manifest_path("app-1").unlink()
+
+    assert store.gc(dry_run=True)[0] > 0
+    assert _chunk_count(store) == chunks
+    count, size = store.gc()
+    assert count > 0 and size > 0
+    assert _chunk_count(store) == chunks - count
+    assert b"".join(store.read("app-2")) == _dump(range(500, 1500))
+
+
+def test_gc_grace_period(store):
+    _snapshot(store, "app-1", _dump(range(100)))
+    store._manifest_path("app-1").unlink()
+    store.gc_grace_period = 3600
+    assert store.gc() == (0, 0)
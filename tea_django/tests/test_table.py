@@ -0,0 +1,25 @@
+import io
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rich.console import Console
+
+from tea_django.models.table import displayed_fields, render_pages
+from tea_django.tests.models import Owner, Item
+
+
+def test_displayed_fields():
+    assert displayed_fields(Item) == ["name", "owner"]
+
+
+def test_render_pages_selects_related_objects(db):
+    owners = [Owner.objects.create(name=f"owner {i}") for i in range(5)]
+    for owner in owners:
+        Item.objects.create(name="item", owner=owner)
+    console = Console(file=io.StringIO(), width=200)
+    with CaptureQueriesContext(connection) as queries:
+        count = render_pages(
+            Item.objects.order_by("name"), page_size=2, console=console
+        )
+    assert count == 5
+    assert len(queries) == 1
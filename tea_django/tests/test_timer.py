@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from tea import timestamp as ts
+
+from tea_django.tests.models import PlainTimer, Run
+
+
+def test_mixin_keeps_default_manager():
+    assert PlainTimer._default_manager.name == "objects"
+    assert Run._default_manager.name == "objects"
+    assert hasattr(Run.objects, "column_dicts")
+    assert hasattr(Run.objects, "stop_all")
+
+
+def test_stop_all(db):
+    now = ts.now()
+    runs = Run.objects.bulk_create(
+        Run(start_time=now - timedelta(seconds=10 * i, microseconds=500000))
+        for i in range(5)
+    )
+    Run.objects.filter(pk=runs[0].pk).update(end_time=now)
+    assert Run.objects.stop_all() == 4
+    assert not Run.objects.running().exists()
+    for run in Run.objects.exclude(pk=runs[0].pk):
+        # Same truncation as `running_duration`.
+        expected = int((run.end_time - run.start_time).total_seconds())
+        assert run.duration == expected
+
+
+def test_duration_stats(db):
+    now = ts.now()
+    Run.objects.bulk_create(
+        Run(start_time=now - timedelta(seconds=s), end_time=now)
+        for s in (10, 20, 30)
+    )
+    stats = Run.objects.duration_stats()
+    assert stats["count"] == 3
+    assert stats["total"] == timedelta(seconds=60)
+    assert stats["min"] == timedelta(seconds=10)
+    assert stats["max"] == timedelta(seconds=30)
+
+
+def test_duration_buckets(db):
+    now = ts.now()
+    Run.objects.bulk_create(
+        Run(start_time=now - timedelta(days=d, seconds=5), end_time=now)
+        for d in (0, 0, 1)
+    )
+    buckets = list(Run.objects.duration_buckets("day"))
+    assert [bucket["count"] for bucket in buckets] == [1, 2]
@@ -0,0 +1,70 @@
+import uuid
+import base64
+from datetime import timedelta
+
+import pytest
+from tea import timestamp as ts
+
+from tea_django.models.mixins.timestamped import encode_cursor, decode_cursor
+from tea_django.tests.models import PlainStamp, Post
+
+
+def test_mixin_keeps_default_manager():
+    assert PlainStamp._default_manager.name == "objects"
+    assert Post._default_manager.name == "objects"
+    assert hasattr(Post.objects, "column_dicts")
+    assert hasattr(Post.objects, "seek")
+
+
+def _pages(descending, limit=7):
+    objs, cursor = Post.objects.seek(limit=limit, descending=descending)
+    pages = [objs]
+    while cursor is not None:
+        objs, cursor = Post.objects.seek(cursor, limit, descending)
+        pages.append(objs)
+    return pages
+
+
+def test_seek_walks_all_rows_with_ties(db):
+    Post.objects.bulk_create(Post(name=f"{i}") for i in range(30))
+    base = ts.now()
+    # Many rows share a timestamp, the pk breaks the ties.
+    Post.objects.update(created_on=base)
+    Post.objects.filter(
+        pk__in=list(Post.objects.values_list("pk", flat=True)[:10])
+    ).update(created_on=base - timedelta(seconds=1))
+    for descending, order in ((True, "-"), (False, "")):
+        pages = _pages(descending)
+        assert [len(page) for page in pages] == [7, 7, 7, 7, 2]
+        expected = list(
+            Post.objects.order_by(f"{order}created_on", f"{order}pk")
+        )
+        assert [obj for page in pages for obj in page] == expected
+
+
+def test_changed_since(db):
+    Post.objects.bulk_create(Post(name=f"{i}") for i in range(3))
+    moment = ts.now() - timedelta(minutes=1)
+    Post.objects.filter(name="0").update(updated_on=moment)
+    assert Post.objects.changed_since(moment).count() == 2
+
+
+def test_cursor_round_trip():
+    moment = ts.now()
+    pk = uuid.uuid4()
+    cursor = encode_cursor(moment, pk)
+    assert decode_cursor(cursor, Post) == (moment, pk)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        base64.urlsafe_b64encode(b"no separator").decode(),
+        base64.urlsafe_b64encode(b"yesterday|x").decode(),
+        encode_cursor(ts.now(), "notauuid"),
+    ],
+)
+def test_invalid_cursor_raises_value_error(db, cursor):
+    with pytest.raises(ValueError):
+        Post.objects.seek(cursor)
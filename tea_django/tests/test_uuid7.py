@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from tea_django.models import uuid7 as uuid7_module
+from tea_django.models.uuid7 import uuid7, uuid7_time, uuid7_min
+
+
+def test_version_and_variant():
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == "specified in RFC 4122"
+
+
+def test_increasing():
+    values = [uuid7() for _ in range(10000)]
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_increasing_when_clock_goes_back():
+    first = uuid7()
+    with mock.patch.object(uuid7_module.time, "time_ns", return_value=0):
+        second = uuid7()
+    assert second > first
+
+
+def test_time():
+    before = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+    value = uuid7()
+    assert before <= uuid7_time(value) <= datetime.now(timezone.utc)
+
+
+def test_min():
+    moment = datetime.now(timezone.utc)
+    assert uuid7_min(moment) <= uuid7()
+    assert uuid7_min(moment + timedelta(seconds=1)) > uuid7()
@@ -0,0 +1,54 @@
+import io
+import json
+from datetime import timedelta
+
+from tea import timestamp as ts
+
+from tea_django.tests.models import Post, Thing
+
+
+def test_column_dicts_match_column_dict(db):
+    Thing.bulk_create_with_slugs([Thing(name=f"n{i}") for i in range(5)])
+    expected = [obj.column_dict() for obj in Thing.objects.order_by("pk")]
+    assert list(Thing.objects.order_by("pk").column_dicts(2)) == expected
+    assert Thing.column_names() == ("id", "slug", "name", "counter")
+
+
+def _old_posts(count):
+    old = ts.now().replace(microsecond=0) - timedelta(days=30)
+    Post.objects.bulk_create(Post(name=f"{i}") for i in range(count))
+    Post.objects.update(created_on=old, updated_on=old)
+    rows = [post.to_dict() for post in Post.objects.all()]
+    Post.objects.all().delete()
+    return old, rows
+
+
+def test_from_dicts_round_trips_to_dict(db):
+    old, rows = _old_posts(3)
+    assert Post.from_dicts(rows) == 3
+    assert set(Post.objects.values_list("created_on", flat=True)) == {old}
+
+
+def test_from_dicts_jsonl_more_rows_than_backend_limit(db):
+    # SQLite limits the number of rows in a single insert.
+    old, rows = _old_posts(600)
+    lines = "".join(
+        json.dumps({**row, "id": str(row["id"])}, default=str) + "\n"
+        for row in rows
+    )
+    assert Post.from_dicts(io.StringIO(lines)) == 600
+    assert Post.objects.filter(created_on=old).count() == 600
+
+
+def test_from_dicts_without_preserving_timestamps(db):
+    old, rows = _old_posts(2)
+    Post.from_dicts(rows, preserve_timestamps=False)
+    assert not Post.objects.filter(created_on=old).exists()
+
+
+def test_from_dict_does_not_change_fields(db):
+    old, rows = _old_posts(1)
+    post = Post.from_dict(rows[0])
+    assert post.created_on == old
+    field = Post._meta.get_field("created_on")
+    assert field.auto_now_add and Post._meta.get_field("updated_on").auto_now
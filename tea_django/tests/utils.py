@@ -0,0 +1,8 @@
+from tea_django.database.postgresql import PostgreSQLError
+
+
+def failing_psql(commands, **kwargs):
+    """Fail like psql on a SQL error, it exits with 0 without ON_ERROR_STOP."""
+    for command, arguments in commands:
+        if command == "psql" and "ON_ERROR_STOP=1" in arguments:
+            raise PostgreSQLError(command=command, exit_code=3)